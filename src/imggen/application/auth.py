@@ -1,8 +1,9 @@
 """Authentication use cases."""
 
-from datetime import datetime, timedelta
+from datetime import timedelta
 from typing import Optional
 
+from imggen.domain.clock import utcnow_dt
 from imggen.domain.entities import User
 from imggen.domain.crypto import CryptoService
 from imggen.domain.value_objects import SessionInfo
@@ -96,15 +97,15 @@ class LoginUseCase:
         if not user:
             raise UserNotFoundError(f"User '{username}' not found")
         
-        # Verify password
-        if not self.crypto.verify_auth_hash(user.auth_hash, password, user.auth_salt):
+        # Verify password and derive master key (never stored on server)
+        master_key = self.crypto.unlock(
+            user.auth_hash, password, user.auth_salt, user.key_salt
+        )
+        if master_key is None:
             raise AuthenticationError("Invalid password")
         
-        # Derive master key (never stored on server)
-        _, master_key = self.crypto.derive_keys(password, user.auth_salt, user.key_salt)
-        
         # Create session
-        now = datetime.utcnow()
+        now = utcnow_dt()
         session = SessionInfo(
             user_id=user.id,  # type: ignore
             username=user.username,
@@ -0,0 +1,66 @@
+"""Shared helpers for encrypting generated images into the vault."""
+
+import asyncio
+from typing import Tuple
+
+from imggen.domain.bloom import build_prompt_bloom
+from imggen.domain.crypto import ALGORITHM_AES_GCM_BLAKE2B, CryptoService
+from imggen.domain.value_objects import EncryptedBlob, ImageMetadata, SessionInfo
+from imggen.infrastructure.buffer_pool import stream_buffers
+from imggen.infrastructure.storage.base import VaultStorage
+
+
+def store_encrypted(
+    crypto: CryptoService,
+    vault_storage: VaultStorage,
+    session: SessionInfo,
+    data: bytes,
+    filename: str,
+) -> str:
+    """Encrypt image bytes into the vault in chunks, returning the vault path."""
+    salt = crypto.generate_salt()
+    with stream_buffers.buffer() as buf:
+        return vault_storage.store_stream(
+            user_id=session.user_id,
+            filename=filename,
+            algorithm=ALGORITHM_AES_GCM_BLAKE2B,
+            salt=salt,
+            write=lambda f: crypto.encrypt_into(data, session.master_key, f, buf, salt=salt),
+        )
+
+
+async def store_image_with_metadata(
+    crypto: CryptoService,
+    vault_storage: VaultStorage,
+    session: SessionInfo,
+    data: bytes,
+    filename: str,
+    metadata: ImageMetadata,
+) -> Tuple[str, EncryptedBlob, EncryptedBlob]:
+    """
+    Store an encrypted image and encrypt its metadata.
+
+    Args:
+        crypto: Crypto service
+        vault_storage: Vault the image is written to
+        session: Active session (owner and master key)
+        data: Plaintext image bytes
+        filename: Vault filename
+        metadata: Image metadata
+
+    Returns:
+        (vault path, encrypted metadata, encrypted prompt bloom filter)
+    """
+    # Encrypt + store the image while metadata and the prompt bloom filter
+    # (lets search skip non-matching metadata) are encrypted together on
+    # another thread
+    vault_path, (encrypted_metadata, encrypted_bloom) = await asyncio.gather(
+        asyncio.to_thread(store_encrypted, crypto, vault_storage, session, data, filename),
+        asyncio.to_thread(
+            crypto.encrypt_metadata_many,
+            metadata.to_storage_dict(),
+            [build_prompt_bloom(metadata.prompt)],
+            session.master_key,
+        ),
+    )
+    return vault_path, encrypted_metadata, encrypted_bloom
@@ -1,15 +1,99 @@
 """Gallery management use cases."""
 
-from typing import List, Optional
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 from pathlib import Path
 
 from imggen.domain.entities import Image
+from imggen.domain.bloom import bloom_may_contain
 from imggen.domain.crypto import CryptoService
-from imggen.domain.value_objects import ImageMetadata
-from imggen.domain.exceptions import ImageNotFoundError, VaultAccessError
+from imggen.domain.value_objects import EncryptedBlob, ImageMetadata, SessionInfo
+from imggen.domain.exceptions import EncryptionError, ImageNotFoundError, VaultAccessError
+from imggen.infrastructure.buffer_pool import stream_buffers
 from imggen.infrastructure.database.base import ImageRepository
 from imggen.infrastructure.storage.base import VaultStorage
-from imggen.infrastructure.session import SessionManager
+from imggen.infrastructure.session import SessionManager, register_session_cache
+
+# AES-GCM in OpenSSL releases the GIL, so metadata decryption scales across threads
+_SEARCH_POOL = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="imggen-search")
+_SEARCH_BATCH_SIZE = 4 * (os.cpu_count() or 1)
+
+
+class _MetadataCache:
+    """
+    Thread-safe LRU cache of decrypted image metadata.
+    
+    Metadata is immutable per image, so entries only need evicting when the
+    image is deleted. Keys include a fingerprint of the master key so one
+    user's cached plaintext is never served for another key.
+    """
+    
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[int, bytes], ImageMetadata]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key_fingerprint(master_key: bytes) -> bytes:
+        """Get a non-reversible fingerprint of a master key."""
+        return hashlib.blake2b(master_key, digest_size=16).digest()
+    
+    def get(self, image_id: int, fingerprint: bytes) -> Optional[ImageMetadata]:
+        """Get cached metadata, marking it most recently used."""
+        key = (image_id, fingerprint)
+        with self._lock:
+            metadata = self._entries.get(key)
+            if metadata is not None:
+                self._entries.move_to_end(key)
+            return metadata
+    
+    def put(self, image_id: int, fingerprint: bytes, metadata: ImageMetadata) -> None:
+        """Cache metadata, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[(image_id, fingerprint)] = metadata
+            self._entries.move_to_end((image_id, fingerprint))
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def evict(self, image_id: int) -> None:
+        """Drop all cached entries for an image."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == image_id]:
+                del self._entries[key]
+    
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+
+
+_metadata_cache = _MetadataCache()
+register_session_cache(_metadata_cache.clear)
+
+
+def _compile_matcher(keywords: Sequence[str], match_all: bool) -> Callable[[str], bool]:
+    """
+    Compile a matcher for lowercased prompts.
+    
+    A single keyword uses a plain substring test. For several keywords, "any"
+    matching scans the prompt once with a precompiled alternation, while "all"
+    matching tests each keyword (an alternation scan would miss overlapping
+    keywords such as "sun" inside "sunset").
+    """
+    needles = [keyword.lower() for keyword in keywords]
+    if len(needles) == 1:
+        needle = needles[0]
+        return lambda text: needle in text
+    if match_all:
+        return lambda text: all(needle in text for needle in needles)
+    pattern = re.compile("|".join(map(re.escape, needles)))
+    return lambda text: pattern.search(text) is not None
 
 
 class ListImagesUseCase:
@@ -39,6 +123,38 @@ class ListImagesUseCase:
         """
         session = self.session_manager.require_session()
         return self.image_repo.list_by_user(session.user_id, limit=limit, offset=offset)
+    
+    def iter(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        after_id: Optional[int] = None,
+    ) -> Iterator[Image]:
+        """
+        Iterate over user's images as rows are read, without loading the page first.
+        
+        Args:
+            limit: Maximum number of images
+            offset: Offset for pagination
+            after_id: Start after this image ID (keyset pagination; prefer over offset)
+        
+        Returns:
+            Iterator of images, newest first
+        
+        Raises:
+            SessionNotFoundError: If not logged in (raised immediately)
+            ImageNotFoundError: If after_id isn't one of the user's images
+                (raised immediately)
+        """
+        session = self.session_manager.require_session()
+        
+        # An unknown anchor would otherwise read as an empty (last) page
+        if after_id is not None and not self.image_repo.get_by_id(after_id, session.user_id):
+            raise ImageNotFoundError(f"Image {after_id} not found")
+        
+        return self.image_repo.iter_by_user(
+            session.user_id, limit=limit, offset=offset, after_id=after_id
+        )
 
 
 class GetImageMetadataUseCase:
@@ -70,6 +186,12 @@ class GetImageMetadataUseCase:
         """
         session = self.session_manager.require_session()
         
+        # Serve previously decrypted metadata for this key
+        fingerprint = _MetadataCache.key_fingerprint(session.master_key)
+        metadata = _metadata_cache.get(image_id, fingerprint)
+        if metadata is not None:
+            return metadata
+        
         # Get image
         image = self.image_repo.get_by_id(image_id, session.user_id)
         if not image:
@@ -79,7 +201,57 @@ class GetImageMetadataUseCase:
         metadata_dict = self.crypto.decrypt_metadata(image.metadata_blob, session.master_key)
         
         # Parse as ImageMetadata
-        return ImageMetadata(**metadata_dict)
+        metadata = ImageMetadata.from_storage_dict(metadata_dict)
+        _metadata_cache.put(image_id, fingerprint, metadata)
+        return metadata
+    
+    def execute_batch(self, image_ids: Sequence[int]) -> Dict[int, ImageMetadata]:
+        """
+        Get decrypted metadata for several images at once.
+        
+        The session is read once, uncached images are fetched in a single
+        query, and their metadata is decrypted in parallel.
+        
+        Args:
+            image_ids: Image IDs
+        
+        Returns:
+            Metadata by image ID; IDs that don't exist or fail to decrypt are
+            left out
+        
+        Raises:
+            SessionNotFoundError: If not logged in
+        """
+        session = self.session_manager.require_session()
+        fingerprint = _MetadataCache.key_fingerprint(session.master_key)
+        
+        found: Dict[int, ImageMetadata] = {}
+        missing = []
+        for image_id in image_ids:
+            metadata = _metadata_cache.get(image_id, fingerprint)
+            if metadata is None:
+                missing.append(image_id)
+            else:
+                found[image_id] = metadata
+        
+        if not missing:
+            return found
+        
+        def decrypt_one(image: Image) -> Optional[ImageMetadata]:
+            try:
+                return ImageMetadata.from_storage_dict(
+                    self.crypto.decrypt_metadata(image.metadata_blob, session.master_key)
+                )
+            except (EncryptionError, ValueError):
+                return None
+        
+        images = self.image_repo.get_many(missing, session.user_id)
+        for image, metadata in zip(images, _SEARCH_POOL.map(decrypt_one, images)):
+            if metadata is not None:
+                _metadata_cache.put(image.id, fingerprint, metadata)  # type: ignore
+                found[image.id] = metadata  # type: ignore
+        
+        return found
 
 
 class ExportImageUseCase:
@@ -120,18 +292,68 @@ class ExportImageUseCase:
         if not image:
             raise ImageNotFoundError(f"Image {image_id} not found")
         
-        # Retrieve encrypted data
-        encrypted_blob = self.vault_storage.retrieve(image.vault_path)
-        if not encrypted_blob:
-            raise VaultAccessError(f"Failed to retrieve image from vault")
+        return self._export(session, image, output_path)
+    
+    def execute_many(
+        self, image_ids: Sequence[int], output_dir: Path
+    ) -> Tuple[Dict[int, Path], Dict[int, Exception]]:
+        """
+        Decrypt and export several images into a directory, in parallel.
+        
+        A failed export doesn't stop the others; its error is reported
+        alongside the paths that were written.
+        
+        Args:
+            image_ids: Image IDs
+            output_dir: Directory to write image_<id>.png files to
+        
+        Returns:
+            (output path by image ID, error by image ID) - an export fails
+            with VaultAccessError if its vault file can't be read, with
+            EncryptionError if it doesn't decrypt, or with OSError if the
+            output can't be written. IDs that don't exist are in neither.
         
-        # Decrypt
-        decrypted_bytes = self.crypto.decrypt(encrypted_blob, session.master_key)
+        Raises:
+            SessionNotFoundError: If not logged in
+        """
+        session = self.session_manager.require_session()
+        images = self.image_repo.get_many(image_ids, session.user_id)
+        
+        # Each export streams through its own pooled buffer, and AES-GCM
+        # releases the GIL, so files decrypt concurrently
+        futures = {
+            image.id: _SEARCH_POOL.submit(
+                self._export, session, image, output_dir / f"image_{image.id}.png"
+            )
+            for image in images
+        }
         
-        # Write to file
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, "wb") as f:
-            f.write(decrypted_bytes)
+        exported: Dict[int, Path] = {}
+        failed: Dict[int, Exception] = {}
+        for image_id, future in futures.items():
+            try:
+                exported[image_id] = future.result()  # type: ignore
+            except (VaultAccessError, EncryptionError, OSError) as e:
+                failed[image_id] = e  # type: ignore
+        return exported, failed
+    
+    def _export(self, session: SessionInfo, image: Image, output_path: Path) -> Path:
+        """Decrypt one image into output_path."""
+        # Open encrypted data (memory-mapped for large files, so the
+        # ciphertext is paged in as it is decrypted)
+        with self.vault_storage.open_blob(image.vault_path) as encrypted_blob:
+            if not encrypted_blob:
+                raise VaultAccessError(f"Failed to retrieve image from vault")
+            
+            # Decrypt straight into the output file in chunks
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                with open(output_path, "wb") as f, stream_buffers.buffer() as buf:
+                    self.crypto.decrypt_into(encrypted_blob, session.master_key, f, buf)
+            except EncryptionError:
+                # Don't leave unauthenticated plaintext behind
+                output_path.unlink(missing_ok=True)
+                raise
         
         return output_path
 
@@ -169,11 +391,16 @@ class DeleteImageUseCase:
         if not image:
             return False
         
+        # Delete the database record first: if the vault delete then fails, an
+        # orphaned ciphertext file is left behind rather than a gallery entry
+        # pointing at a missing (or half-overwritten) file
+        if not self.image_repo.delete(image_id, session.user_id):
+            return False
+        _metadata_cache.evict(image_id)
+        
         # Delete vault file
         self.vault_storage.delete(image.vault_path)
-        
-        # Delete database record
-        return self.image_repo.delete(image_id, session.user_id)
+        return True
 
 
 class SearchImagesUseCase:
@@ -189,46 +416,102 @@ class SearchImagesUseCase:
         self.crypto = crypto_service
         self.session_manager = session_manager
     
-    def execute(self, keyword: str, limit: int = 100) -> List[tuple[Image, ImageMetadata]]:
+    def execute(
+        self,
+        keywords: Union[str, Sequence[str]],
+        limit: int = 100,
+        match_all: bool = True,
+    ) -> Tuple[List[tuple[Image, ImageMetadata]], int]:
         """
-        Search images by prompt keyword.
+        Search images by prompt keywords (case-insensitive substrings).
         
-        Note: This requires decrypting all metadata to search.
+        Note: This requires decrypting metadata to search. Prompt bloom filters
+        are checked first, so only candidate rows are loaded and have their
+        metadata decrypted, and scanning stops once limit matches have been found.
         
         Args:
-            keyword: Search keyword
-            limit: Maximum results
+            keywords: Search keyword or keywords
+            limit: Maximum number of matches to return
+            match_all: Require every keyword (True) or any keyword (False)
         
         Returns:
-            List of (Image, ImageMetadata) tuples
+            (list of (Image, ImageMetadata) tuples, number of scanned images
+            skipped because their bloom filter or metadata didn't decrypt -
+            a wrong key or corrupted rows)
         
         Raises:
             SessionNotFoundError: If not logged in
         """
         session = self.session_manager.require_session()
         
-        # Get all user images
-        images = self.image_repo.list_by_user(session.user_id, limit=limit)
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        matches = _compile_matcher(keywords, match_all)
+        bloom_check = all if match_all else any
         
-        # Search by decrypting metadata
-        results = []
-        keyword_lower = keyword.lower()
+        fingerprint = _MetadataCache.key_fingerprint(session.master_key)
+        # IDs of rows that failed to decrypt (list.append is atomic across the pool)
+        unreadable: List[int] = []
         
-        for image in images:
+        def _is_candidate(item: Tuple[int, Optional[EncryptedBlob]]) -> bool:
+            image_id, prompt_bloom = item
+            if prompt_bloom is None or _metadata_cache.get(image_id, fingerprint) is not None:
+                return True
+            
+            try:
+                bloom = self.crypto.decrypt(prompt_bloom, session.master_key)
+            except EncryptionError:
+                unreadable.append(image_id)
+                return False
+            return bloom_check(bloom_may_contain(bloom, k) for k in keywords)
+        
+        def _match_one(image: Image) -> Optional[tuple[Image, ImageMetadata]]:
+            cached = _metadata_cache.get(image.id, fingerprint)  # type: ignore
+            if cached is not None:
+                return (image, cached) if matches(cached.prompt.lower()) else None
+            
             try:
                 metadata_dict = self.crypto.decrypt_metadata(
                     image.metadata_blob,
                     session.master_key,
                 )
-                metadata = ImageMetadata(**metadata_dict)
-                
-                # Check if keyword in prompt
-                if keyword_lower in metadata.prompt.lower():
-                    results.append((image, metadata))
-                    
-            except Exception:
-                # Skip images with decryption errors
+                # Older records lack prompt_lower
+                prompt_lower = metadata_dict.get("prompt_lower") or metadata_dict["prompt"].lower()
+            except (EncryptionError, ValueError, KeyError):
+                unreadable.append(image.id)  # type: ignore
+                return None
+            
+            # Check keywords before building the model
+            if not matches(prompt_lower):
+                return None
+            
+            metadata = ImageMetadata.from_storage_dict(metadata_dict)
+            _metadata_cache.put(image.id, fingerprint, metadata)  # type: ignore
+            return image, metadata
+        
+        # Rule out images from their (much smaller) prompt bloom filters, newest
+        # first, in pool-sized batches, then load the surviving rows in one query
+        # and decrypt their metadata; scanning stops once enough matches are found
+        blooms = self.image_repo.iter_prompt_blooms(session.user_id)
+        results: List[tuple[Image, ImageMetadata]] = []
+        while len(results) < limit:
+            batch = list(islice(blooms, _SEARCH_BATCH_SIZE))
+            if not batch:
+                break
+            
+            candidate_ids = [
+                image_id
+                for (image_id, _), ok in zip(batch, _SEARCH_POOL.map(_is_candidate, batch))
+                if ok
+            ]
+            if not candidate_ids:
                 continue
+            
+            by_id = {
+                image.id: image
+                for image in self.image_repo.get_many(candidate_ids, session.user_id)
+            }
+            candidates = [by_id[image_id] for image_id in candidate_ids if image_id in by_id]
+            results.extend(result for result in _SEARCH_POOL.map(_match_one, candidates) if result)
         
-        return results
-
+        return results[:limit], len(unreadable)
@@ -1,13 +1,15 @@
 """Image generation use cases."""
 
-import random
-from datetime import datetime
-from typing import Optional
+import asyncio
+from secrets import randbits
+from typing import List, Optional, Sequence
 
+from imggen.domain.clock import utcnow_dt
 from imggen.domain.entities import Image
 from imggen.domain.crypto import CryptoService
-from imggen.domain.value_objects import ImageMetadata, EncryptedBlob
-from imggen.domain.exceptions import GenerationError
+from imggen.domain.value_objects import ImageMetadata, SessionInfo
+from imggen.domain.exceptions import GenerationError, VaultAccessError
+from imggen.application.encryption import store_image_with_metadata
 from imggen.infrastructure.database.base import ImageRepository
 from imggen.infrastructure.gpu.base import GPUProvider
 from imggen.infrastructure.storage.base import VaultStorage
@@ -31,6 +33,53 @@ class GenerateImageUseCase:
         self.crypto = crypto_service
         self.session_manager = session_manager
     
+    async def _generate_image(
+        self,
+        session: SessionInfo,
+        prompt: str,
+        negative_prompt: str,
+        width: int,
+        height: int,
+        steps: int,
+        cfg_scale: float,
+        seed: int,
+    ) -> Image:
+        """Generate, encrypt and store one image, returning the unsaved Image record."""
+        # Generate image
+        image_bytes = await self.gpu_provider.generate(
+            prompt=prompt,
+            negative_prompt=negative_prompt,
+            width=width,
+            height=height,
+            steps=steps,
+            cfg_scale=cfg_scale,
+            seed=seed,
+        )
+        
+        # Create metadata
+        metadata = ImageMetadata(
+            prompt=prompt,
+            negative_prompt=negative_prompt,
+            width=width,
+            height=height,
+            steps=steps,
+            cfg_scale=cfg_scale,
+            seed=seed,
+            provider=self.gpu_provider.name,
+            created_at=utcnow_dt(),
+        )
+        vault_path, encrypted_metadata, encrypted_bloom = await store_image_with_metadata(
+            self.crypto, self.vault_storage, session, image_bytes, f"image_{seed}.png", metadata
+        )
+        
+        # Create image record
+        return Image(
+            user_id=session.user_id,
+            vault_path=vault_path,
+            metadata_blob=encrypted_metadata,
+            prompt_bloom=encrypted_bloom,
+        )
+    
     async def execute(
         self,
         prompt: str,
@@ -65,58 +114,78 @@ class GenerateImageUseCase:
         
         # Generate seed if not provided
         if seed is None:
-            seed = random.randint(0, 2**32 - 1)
+            seed = randbits(32)
         
         # Check GPU provider health
         if not await self.gpu_provider.health_check():
             raise GenerationError("GPU provider is not available")
         
-        # Generate image
-        image_bytes = await self.gpu_provider.generate(
-            prompt=prompt,
-            negative_prompt=negative_prompt,
-            width=width,
-            height=height,
-            steps=steps,
-            cfg_scale=cfg_scale,
-            seed=seed,
+        image = await self._generate_image(
+            session, prompt, negative_prompt, width, height, steps, cfg_scale, seed
         )
         
-        # Encrypt image
-        encrypted_image = self.crypto.encrypt(image_bytes, session.master_key)
+        # Persist
+        return self.image_repo.create(image)
+    
+    async def execute_batch(
+        self,
+        prompts: Sequence[str],
+        negative_prompt: str = "",
+        width: int = 1024,
+        height: int = 1024,
+        steps: int = 25,
+        cfg_scale: float = 7.0,
+    ) -> List[Image]:
+        """
+        Generate several encrypted images and persist them in one transaction.
+        
+        Each prompt gets its own random seed. GPU requests are issued
+        concurrently; if any generation or the database insert fails, the
+        vault files already written for the batch are deleted and no image
+        records are created.
         
-        # Store encrypted image in vault
-        vault_path = self.vault_storage.store(
-            user_id=session.user_id,
-            blob=encrypted_image,
-            filename=f"image_{seed}.png",
-        )
+        Args:
+            prompts: Generation prompts
+            negative_prompt: Negative prompt shared by all images
+            width: Image width
+            height: Image height
+            steps: Sampling steps
+            cfg_scale: CFG scale
         
-        # Create metadata
-        metadata = ImageMetadata(
-            prompt=prompt,
-            negative_prompt=negative_prompt,
-            width=width,
-            height=height,
-            steps=steps,
-            cfg_scale=cfg_scale,
-            seed=seed,
-            provider=self.gpu_provider.__class__.__name__,
-            created_at=datetime.utcnow(),
-        )
+        Returns:
+            Created Image entities, in prompt order
         
-        # Encrypt metadata
-        metadata_dict = metadata.model_dump()
-        metadata_dict["created_at"] = metadata.created_at.isoformat()
-        encrypted_metadata = self.crypto.encrypt_metadata(metadata_dict, session.master_key)
+        Raises:
+            SessionNotFoundError: If not logged in
+            GenerationError: If any generation fails
+        """
+        session = self.session_manager.require_session()
         
-        # Create image record
-        image = Image(
-            user_id=session.user_id,
-            vault_path=vault_path,
-            metadata_blob=encrypted_metadata,
+        if not await self.gpu_provider.health_check():
+            raise GenerationError("GPU provider is not available")
+        
+        results = await asyncio.gather(
+            *(
+                self._generate_image(
+                    session, prompt, negative_prompt, width, height, steps, cfg_scale, randbits(32)
+                )
+                for prompt in prompts
+            ),
+            return_exceptions=True,
         )
+        images = [r for r in results if isinstance(r, Image)]
+        failures = [r for r in results if isinstance(r, BaseException)]
         
-        # Persist
-        return self.image_repo.create(image)
-
+        try:
+            if failures:
+                raise failures[0]
+            return self.image_repo.create_many(images)
+        except BaseException:
+            # Don't leave ciphertext behind for records that were never created;
+            # a failed delete mustn't hide the original error or stop the rest
+            for image in images:
+                try:
+                    self.vault_storage.delete(image.vault_path)
+                except VaultAccessError:
+                    pass
+            raise
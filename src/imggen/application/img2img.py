@@ -1,18 +1,53 @@
 """Image-to-image transformation use cases."""
 
+import asyncio
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 from PIL import Image as PILImage
 import io
+import struct
+import threading
+from secrets import randbits
 
+from imggen.domain.clock import utcnow_dt
 from imggen.domain.entities import Image
 from imggen.domain.crypto import CryptoService
-from imggen.domain.value_objects import ImageMetadata
+from imggen.domain.value_objects import ImageMetadata, SessionInfo
 from imggen.domain.exceptions import ImageNotFoundError, GenerationError
 from imggen.infrastructure.database.base import ImageRepository
 from imggen.infrastructure.gpu.base import GPUProvider
 from imggen.infrastructure.storage.base import VaultStorage
 from imggen.infrastructure.session import SessionManager
+from imggen.application.encryption import store_image_with_metadata
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+MAX_REUSED_BUFFER = 16 * 1024 * 1024
+
+_tls = threading.local()
+
+
+def _decode_buffer(data: bytes) -> io.BytesIO:
+    """Load data into this thread's reusable BytesIO, dropping it if it grew too large."""
+    buf = getattr(_tls, "buf", None)
+    if buf is None or len(data) > MAX_REUSED_BUFFER:
+        buf = io.BytesIO()
+        _tls.buf = buf if len(data) <= MAX_REUSED_BUFFER else None
+    buf.seek(0)
+    buf.truncate()
+    buf.write(data)
+    buf.seek(0)
+    return buf
+
+
+def _image_size(data: bytes) -> Tuple[int, int]:
+    """Get image (width, height), reading the PNG IHDR header directly when possible."""
+    # PNG: 8-byte signature, then IHDR chunk (length, type, width, height)
+    if data[:8] == PNG_SIGNATURE and data[12:16] == b"IHDR":
+        return struct.unpack(">II", data[16:24])
+
+    # Other formats (JPEG, WebP, ...) - let PIL parse the header
+    with PILImage.open(_decode_buffer(data)) as img:
+        return img.size
 
 
 class Img2ImgUseCase:
@@ -68,11 +103,12 @@ class Img2ImgUseCase:
         if not input_image_path.exists():
             raise GenerationError(f"Input image not found: {input_image_path}")
 
-        with open(input_image_path, "rb") as f:
-            input_image_bytes = f.read()
-
-        # Check GPU provider health
-        if not await self.gpu_provider.health_check():
+        # Read the input on a worker thread while the health check is in flight
+        input_image_bytes, healthy = await asyncio.gather(
+            asyncio.to_thread(input_image_path.read_bytes),
+            self.gpu_provider.health_check(),
+        )
+        if not healthy:
             raise GenerationError("GPU provider is not available")
 
         # Check if provider supports img2img
@@ -91,25 +127,12 @@ class Img2ImgUseCase:
         )
 
         # Get image dimensions
-        img = PILImage.open(io.BytesIO(output_image_bytes))
-        width, height = img.size
-
-        # Encrypt image
-        encrypted_image = self.crypto.encrypt(output_image_bytes, session.master_key)
-
-        # Store in vault
-        vault_path = self.vault_storage.store(
-            user_id=session.user_id,
-            blob=encrypted_image,
-            filename=f"img2img_{seed or 0}.png",
-        )
+        width, height = _image_size(output_image_bytes)
 
         # Create metadata
-        from datetime import datetime
-        import random
-
+        filename = f"img2img_{seed or 0}.png"
         if seed is None:
-            seed = random.randint(0, 2**32 - 1)
+            seed = randbits(32)
 
         metadata = ImageMetadata(
             prompt=f"[img2img] {prompt}",
@@ -119,15 +142,11 @@ class Img2ImgUseCase:
             steps=steps,
             cfg_scale=cfg_scale,
             seed=seed,
-            provider=self.gpu_provider.__class__.__name__,
-            created_at=datetime.utcnow(),
+            provider=self.gpu_provider.name,
+            created_at=utcnow_dt(),
         )
-
-        # Encrypt metadata
-        metadata_dict = metadata.model_dump()
-        metadata_dict["created_at"] = metadata.created_at.isoformat()
-        encrypted_metadata = self.crypto.encrypt_metadata(
-            metadata_dict, session.master_key
+        vault_path, encrypted_metadata, encrypted_bloom = await store_image_with_metadata(
+            self.crypto, self.vault_storage, session, output_image_bytes, filename, metadata
         )
 
         # Create image record
@@ -135,6 +154,7 @@ class Img2ImgUseCase:
             user_id=session.user_id,
             vault_path=vault_path,
             metadata_blob=encrypted_metadata,
+            prompt_bloom=encrypted_bloom,
         )
 
         # Persist
@@ -158,6 +178,16 @@ class RestyleImageUseCase:
         self.crypto = crypto_service
         self.session_manager = session_manager
 
+    def _load_original(self, session: SessionInfo, original: Image) -> Tuple[bytes, ImageMetadata]:
+        """Read and decrypt an image and its metadata from the vault."""
+        encrypted_blob = self.vault_storage.retrieve(original.vault_path)
+        if not encrypted_blob:
+            raise GenerationError("Failed to retrieve original image")
+
+        decrypted_bytes = self.crypto.decrypt(encrypted_blob, session.master_key)
+        metadata_dict = self.crypto.decrypt_metadata(original.metadata_blob, session.master_key)
+        return decrypted_bytes, ImageMetadata.from_storage_dict(metadata_dict)
+
     async def execute(
         self,
         image_id: int,
@@ -184,18 +214,10 @@ class RestyleImageUseCase:
         if not original:
             raise ImageNotFoundError(f"Image {image_id} not found")
 
-        # Retrieve and decrypt original
-        encrypted_blob = self.vault_storage.retrieve(original.vault_path)
-        if not encrypted_blob:
-            raise GenerationError("Failed to retrieve original image")
-
-        decrypted_bytes = self.crypto.decrypt(encrypted_blob, session.master_key)
-
-        # Get original metadata for seed
-        metadata_dict = self.crypto.decrypt_metadata(
-            original.metadata_blob, session.master_key
+        # Retrieve and decrypt the original off the event loop
+        decrypted_bytes, original_metadata = await asyncio.to_thread(
+            self._load_original, session, original
         )
-        original_metadata = ImageMetadata(**metadata_dict)
 
         # Check provider support
         if not hasattr(self.gpu_provider, "img2img"):
@@ -213,20 +235,9 @@ class RestyleImageUseCase:
         )
 
         # Get dimensions
-        img = PILImage.open(io.BytesIO(output_bytes))
-        width, height = img.size
-
-        # Encrypt and store
-        encrypted_image = self.crypto.encrypt(output_bytes, session.master_key)
-        vault_path = self.vault_storage.store(
-            user_id=session.user_id,
-            blob=encrypted_image,
-            filename=f"restyle_{image_id}_{original_metadata.seed}.png",
-        )
+        width, height = _image_size(output_bytes)
 
         # Create metadata
-        from datetime import datetime
-
         new_metadata = ImageMetadata(
             prompt=f"[Restyled from #{image_id}] {style_prompt}",
             negative_prompt=negative_prompt,
@@ -235,15 +246,16 @@ class RestyleImageUseCase:
             steps=original_metadata.steps,
             cfg_scale=original_metadata.cfg_scale,
             seed=original_metadata.seed,
-            provider=self.gpu_provider.__class__.__name__,
-            created_at=datetime.utcnow(),
+            provider=self.gpu_provider.name,
+            created_at=utcnow_dt(),
         )
-
-        # Encrypt metadata
-        metadata_dict = new_metadata.model_dump()
-        metadata_dict["created_at"] = new_metadata.created_at.isoformat()
-        encrypted_metadata = self.crypto.encrypt_metadata(
-            metadata_dict, session.master_key
+        vault_path, encrypted_metadata, encrypted_bloom = await store_image_with_metadata(
+            self.crypto,
+            self.vault_storage,
+            session,
+            output_bytes,
+            f"restyle_{image_id}_{original_metadata.seed}.png",
+            new_metadata,
         )
 
         # Create record
@@ -251,6 +263,7 @@ class RestyleImageUseCase:
             user_id=session.user_id,
             vault_path=vault_path,
             metadata_blob=encrypted_metadata,
+            prompt_bloom=encrypted_bloom,
         )
 
         return self.image_repo.create(new_image)
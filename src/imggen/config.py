@@ -1,9 +1,17 @@
 """Application configuration with environment support."""
 
+import sys
+import threading
+from functools import lru_cache
 from pathlib import Path
+from typing import Literal
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Directories already created/verified by ensure_dirs in this process
+_VERIFIED_DIRS: set[Path] = set()
+_VERIFIED_DIRS_LOCK = threading.Lock()
+
 
 class Settings(BaseSettings):
     """Application settings."""
@@ -25,12 +33,24 @@ class Settings(BaseSettings):
     # ComfyUI
     comfyui_url: str = Field(default="http://127.0.0.1:8188", description="ComfyUI API URL")
     comfyui_timeout: int = Field(default=300, description="ComfyUI request timeout (seconds)")
+    health_cache_ttl: float = Field(
+        default=2.0, description="How long a healthy ComfyUI check is reused (seconds)"
+    )
     
     # Security
     session_timeout: int = Field(default=3600, description="Session timeout in seconds")
     argon2_time_cost: int = Field(default=3, description="Argon2 time cost")
     argon2_memory_cost: int = Field(default=65536, description="Argon2 memory cost (KB)")
     argon2_parallelism: int = Field(default=4, description="Argon2 parallelism")
+    kdf_algorithm: Literal["argon2id", "pbkdf2"] = Field(
+        default="argon2id",
+        description="Password KDF (pbkdf2 is faster but weaker; for dev/test deployments)",
+    )
+    pbkdf2_iterations: int = Field(default=210_000, description="PBKDF2 iteration count")
+    kdf_hash: str = Field(
+        default_factory=lambda: "sha512" if sys.maxsize > 2**32 else "sha256",
+        description="PBKDF2 digest (sha512 on 64-bit hosts, sha256 otherwise)",
+    )
     
     # Generation defaults
     default_width: int = Field(default=1024, description="Default image width")
@@ -41,11 +61,23 @@ class Settings(BaseSettings):
     
     def ensure_dirs(self) -> None:
         """Create necessary directories if they don't exist."""
-        self.data_dir.mkdir(parents=True, exist_ok=True)
-        self.vault_dir.mkdir(parents=True, exist_ok=True)
-        self.session_dir.mkdir(parents=True, exist_ok=True)
+        with _VERIFIED_DIRS_LOCK:
+            for path in (self.data_dir, self.vault_dir, self.session_dir):
+                if path in _VERIFIED_DIRS:
+                    continue
+                path.mkdir(parents=True, exist_ok=True)
+                _VERIFIED_DIRS.add(path)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the global settings instance (loaded from env/.env on first call)."""
+    return Settings()
 
 
-# Global settings instance
-settings = Settings()
+def __getattr__(name: str) -> Settings:
+    # Backward compatibility: resolve `imggen.config.settings` lazily
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
@@ -0,0 +1,66 @@
+"""Prompt bloom filters for pre-filtering encrypted search."""
+
+import hashlib
+from functools import lru_cache
+from typing import Iterable, Set
+
+BLOOM_BITS = 4096
+BLOOM_HASHES = 3
+
+
+def _trigrams(text: str) -> Set[str]:
+    """Get the set of lowercased character trigrams in text."""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _positions(gram: str) -> Iterable[int]:
+    """Get the bit positions for a trigram."""
+    digest = hashlib.blake2b(gram.encode("utf-8"), digest_size=4 * BLOOM_HASHES).digest()
+    for i in range(0, len(digest), 4):
+        yield int.from_bytes(digest[i:i + 4], "little") % BLOOM_BITS
+
+
+def _mask(text: str) -> int:
+    """Get the bloom bits for all trigrams of text, as an int (bit i = position i)."""
+    mask = 0
+    for gram in _trigrams(text):
+        for pos in _positions(gram):
+            mask |= 1 << pos
+    return mask
+
+
+# Search checks the same keywords against every image's filter
+_keyword_mask = lru_cache(maxsize=256)(_mask)
+
+
+def build_prompt_bloom(prompt: str) -> bytes:
+    """
+    Build a bloom filter over the trigrams of a prompt.
+
+    Args:
+        prompt: Generation prompt
+
+    Returns:
+        Bloom filter bits (BLOOM_BITS / 8 bytes)
+    """
+    # Little-endian puts bit pos at byte pos >> 3, bit pos & 7
+    return _mask(prompt).to_bytes(BLOOM_BITS // 8, "little")
+
+
+def bloom_may_contain(bloom: bytes, keyword: str) -> bool:
+    """
+    Check whether a prompt may contain keyword as a (case-insensitive) substring.
+
+    False positives are possible; false negatives are not. Keywords shorter than
+    three characters cannot be filtered and always return True.
+
+    Args:
+        bloom: Bloom filter from build_prompt_bloom
+        keyword: Search keyword
+
+    Returns:
+        False if the prompt definitely does not contain keyword
+    """
+    mask = _keyword_mask(keyword)
+    return int.from_bytes(bloom, "little") & mask == mask
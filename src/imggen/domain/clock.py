@@ -0,0 +1,30 @@
+"""UTC clock helpers."""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+UTC = timezone.utc
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def utcnow_dt() -> datetime:
+    """Get the current time as a timezone-aware UTC datetime."""
+    return datetime.fromtimestamp(time.time(), tz=UTC)
+
+
+def utcnow_iso() -> str:
+    """Get the current UTC time as an ISO-8601 string."""
+    return utcnow_dt().isoformat()
+
+
+def to_unix_micros(dt: datetime) -> int:
+    """Convert a datetime (naive values are taken as UTC) to integer Unix microseconds."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return (dt - EPOCH) // _MICROSECOND
+
+
+def from_unix_micros(micros: int) -> datetime:
+    """Convert integer Unix microseconds to a timezone-aware UTC datetime."""
+    return EPOCH + timedelta(microseconds=micros)
@@ -1,17 +1,230 @@
 """Cryptographic primitives for zero-knowledge encryption."""
 
+import ctypes
+import ctypes.util
+import hashlib
+import hmac
+import mmap
 import os
-import secrets
-from typing import Tuple
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import BinaryIO, List, Optional, Sequence, Tuple, Union
 from argon2 import PasswordHasher
 from argon2.low_level import hash_secret_raw, Type
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives import hashes
 
+from . import fastjson
 from .exceptions import EncryptionError
 from .value_objects import EncryptedBlob
 
+# SHA-512 runs on 64-bit words, so it derives faster than SHA-256 on 64-bit hosts
+DEFAULT_KDF_HASH = "sha512" if sys.maxsize > 2**32 else "sha256"
+
+# Plaintext chunk size for streaming decryption
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# EncryptedBlob.algorithm values. Blobs written before BLAKE2b file keys were
+# introduced use HKDF-SHA256 and are still decryptable.
+ALGORITHM_AES_GCM_HKDF = "AES-256-GCM"
+ALGORITHM_AES_GCM_BLAKE2B = "AES-256-GCM/BLAKE2b"
+
+_SHA256 = hashes.SHA256()
+
+# Upper bound on Argon2 memory_cost (KiB). unlock() runs two derivations at
+# once, so a misconfigured cost fails fast instead of exhausting memory
+MAX_ARGON2_MEMORY_COST = 1 << 20  # 1 GiB
+
+# Worker for running independent key derivations alongside the calling thread
+_KDF_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="imggen-kdf")
+
+
+@lru_cache(maxsize=None)
+def _get_argon2(time_cost: int, memory_cost: int, parallelism: int) -> PasswordHasher:
+    """Get a process-wide Argon2id hasher for the given cost parameters."""
+    return PasswordHasher(
+        time_cost=time_cost,
+        memory_cost=memory_cost,
+        parallelism=parallelism,
+        type=Type.ID,
+    )
+
+
+def _hkdf_sha256(master_key: bytes, salt: bytes, info: bytes) -> bytes:
+    """Derive a 32-byte key with HKDF-SHA256."""
+    return HKDF(algorithm=_SHA256, length=32, salt=salt, info=info).derive(master_key)
+
+
+# Every blob has its own salt, so the HKDF state itself cannot be reused across
+# blobs; instead, keys for legacy blobs that are read repeatedly (search,
+# metadata) are memoized.
+_cached_hkdf_sha256 = lru_cache(maxsize=8192)(_hkdf_sha256)
+
+
+def _blake2b_kdf(master_key: bytes, salt: bytes, info: bytes) -> bytes:
+    """Derive a 32-byte key with keyed, personalized BLAKE2b (one hash call)."""
+    return hashlib.blake2b(master_key, digest_size=32, key=salt, person=info).digest()
+
+
+def _cache_tag(master_key: bytes, salt: bytes) -> bytes:
+    """Fingerprint (master_key, salt) with keyed BLAKE2b without keeping the master key."""
+    return hashlib.blake2b(salt, digest_size=16, key=master_key, person=b"cache-tag").digest()
+
+
+class _CipherCache:
+    """
+    LRU cache of AESGCM objects keyed by (cache tag, algorithm).
+    
+    Searches and metadata views decrypt the same small blobs over and over;
+    a hit skips both the file-key derivation and the AES key schedule.
+    """
+    
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.clear()
+    
+    def clear(self) -> None:
+        """Drop all cached ciphers (and any lock state inherited across fork)."""
+        self._ciphers: "OrderedDict[Tuple[bytes, str], AESGCM]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Tuple[bytes, str]) -> Optional[AESGCM]:
+        """Get a cached cipher and mark it most recently used."""
+        with self._lock:
+            aesgcm = self._ciphers.get(key)
+            if aesgcm is not None:
+                self._ciphers.move_to_end(key)
+            return aesgcm
+    
+    def put(self, key: Tuple[bytes, str], aesgcm: AESGCM) -> None:
+        """Cache a cipher, evicting the least recently used one if full."""
+        with self._lock:
+            self._ciphers[key] = aesgcm
+            self._ciphers.move_to_end(key)
+            if len(self._ciphers) > self.maxsize:
+                self._ciphers.popitem(last=False)
+
+
+_CIPHERS = _CipherCache()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_CIPHERS.clear)
+
+
+def clear_key_caches() -> None:
+    """Drop all cached ciphers and derived file keys (e.g. on logout)."""
+    _CIPHERS.clear()
+    _cached_hkdf_sha256.cache_clear()
+
+
+class _EntropyPool:
+    """
+    Buffered CSPRNG output for nonces and salts.
+    
+    Refills from os.urandom in blocks and hands out each byte exactly once,
+    zeroing it as it goes. Forked children start with an empty buffer so
+    they never reuse bytes the parent also holds.
+    """
+    
+    def __init__(self, refill_size: int = 4096):
+        self.refill_size = refill_size
+        self.reset()
+    
+    def reset(self) -> None:
+        """Discard buffered bytes (and any lock state inherited across fork)."""
+        self._buf = bytearray()
+        self._pos = 0
+        self._lock = threading.Lock()
+    
+    def take(self, n: int) -> bytes:
+        """Get n fresh random bytes."""
+        with self._lock:
+            if self._pos + n > len(self._buf):
+                self._buf = bytearray(os.urandom(max(self.refill_size, n)))
+                self._pos = 0
+            start, self._pos = self._pos, self._pos + n
+            out = bytes(self._buf[start:self._pos])
+            self._buf[start:self._pos] = bytes(n)
+            return out
+
+
+_ENTROPY = _EntropyPool()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_ENTROPY.reset)
+
+
+@lru_cache(maxsize=1)
+def _libc() -> Optional[ctypes.CDLL]:
+    """Load the C library for mlock/munlock (None where unavailable)."""
+    name = ctypes.util.find_library("c")
+    if name is None:
+        return None
+    try:
+        libc = ctypes.CDLL(name, use_errno=True)
+        return libc if hasattr(libc, "mlock") else None
+    except OSError:
+        return None
+
+
+class SecureBuffer:
+    """
+    Fixed-size buffer for sensitive plaintext, kept out of swap and wiped on release.
+    
+    Backed by a private anonymous mapping (page-aligned), locked into RAM with
+    mlock and excluded from core dumps where the platform allows; both are
+    best effort, see `locked`. Access the contents through `view`.
+    """
+    
+    def __init__(self, size: int):
+        self.size = size
+        if hasattr(mmap, "MAP_PRIVATE"):
+            self._mmap = mmap.mmap(-1, size, flags=mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS)
+        else:
+            self._mmap = mmap.mmap(-1, size)
+        if hasattr(mmap, "MADV_DONTDUMP"):
+            self._mmap.madvise(mmap.MADV_DONTDUMP)
+        
+        # The address stays valid for the life of the mapping
+        anchor = (ctypes.c_char * size).from_buffer(self._mmap)
+        self._address = ctypes.addressof(anchor)
+        del anchor
+        
+        libc = _libc()
+        self.locked = bool(libc) and libc.mlock(
+            ctypes.c_void_p(self._address), ctypes.c_size_t(size)
+        ) == 0
+        self.view = memoryview(self._mmap)
+    
+    def wipe(self) -> None:
+        """Zero the buffer contents."""
+        ctypes.memset(self._address, 0, self.size)
+    
+    def close(self) -> None:
+        """Wipe, unlock and unmap the buffer."""
+        if self._mmap.closed:
+            return
+        self.wipe()
+        if self.locked:
+            _libc().munlock(ctypes.c_void_p(self._address), ctypes.c_size_t(self.size))
+            self.locked = False
+        self.view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # A caller still holds a view; the mapping is freed with it
+            pass
+    
+    def __enter__(self) -> "SecureBuffer":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
 
 class CryptoService:
     """
@@ -23,24 +236,72 @@ class CryptoService:
     - All encryption/decryption happens client-side with master_key
     """
     
+    __slots__ = (
+        "time_cost",
+        "memory_cost",
+        "parallelism",
+        "kdf_algorithm",
+        "kdf_hash",
+        "pbkdf2_iterations",
+        "ph",
+    )
+    
     def __init__(
         self,
         time_cost: int = 3,
         memory_cost: int = 65536,  # 64 MB
         parallelism: int = 4,
+        kdf_algorithm: str = "argon2id",
+        kdf_hash: str = DEFAULT_KDF_HASH,
+        pbkdf2_iterations: int = 210_000,
+        max_memory_cost: int = MAX_ARGON2_MEMORY_COST,
     ):
+        if kdf_algorithm not in ("argon2id", "pbkdf2"):
+            raise ValueError(f"Unsupported KDF algorithm: {kdf_algorithm}")
+        if memory_cost > max_memory_cost:
+            raise ValueError(
+                f"Argon2 memory cost {memory_cost} KiB exceeds the limit of {max_memory_cost} KiB"
+            )
+        
         self.time_cost = time_cost
         self.memory_cost = memory_cost
         self.parallelism = parallelism
-        self.ph = PasswordHasher(
-            time_cost=time_cost,
-            memory_cost=memory_cost,
-            parallelism=parallelism,
-        )
+        self.kdf_algorithm = kdf_algorithm
+        self.kdf_hash = kdf_hash
+        self.pbkdf2_iterations = pbkdf2_iterations
+        self.ph = _get_argon2(time_cost, memory_cost, parallelism)
     
     def generate_salt(self) -> bytes:
         """Generate a random 32-byte salt."""
-        return secrets.token_bytes(32)
+        return _ENTROPY.take(32)
+    
+    def _argon2(self, secret: bytes, salt: bytes) -> bytes:
+        """Run raw Argon2id with the shared hasher's parameters."""
+        return hash_secret_raw(
+            secret=secret,
+            salt=salt,
+            time_cost=self.ph.time_cost,
+            memory_cost=self.ph.memory_cost,
+            parallelism=self.ph.parallelism,
+            hash_len=32,
+            type=self.ph.type,
+        )
+    
+    def _pbkdf2(self, secret: bytes, salt: bytes) -> bytes:
+        """Run PBKDF2-HMAC with the configured digest (OpenSSL implementation)."""
+        return hashlib.pbkdf2_hmac(
+            self.kdf_hash,
+            secret,
+            salt,
+            self.pbkdf2_iterations,
+            dklen=32,
+        )
+    
+    def _derive(self, secret: bytes, salt: bytes) -> bytes:
+        """Derive a 32-byte key with the configured password KDF."""
+        if self.kdf_algorithm == "pbkdf2":
+            return self._pbkdf2(secret, salt)
+        return self._argon2(secret, salt)
     
     def derive_keys(
         self,
@@ -59,72 +320,104 @@ class CryptoService:
         Returns:
             Tuple of (auth_hash, master_key)
         """
-        # Derive auth hash (stored server-side for authentication)
-        auth_hash = hash_secret_raw(
-            secret=password.encode("utf-8"),
-            salt=auth_salt,
-            time_cost=self.time_cost,
-            memory_cost=self.memory_cost,
-            parallelism=self.parallelism,
-            hash_len=32,
-            type=Type.ID,
-        )
+        secret = password.encode("utf-8")
         
-        # Derive master key (used for encryption, never stored)
-        master_key = hash_secret_raw(
-            secret=password.encode("utf-8"),
-            salt=key_salt,
-            time_cost=self.time_cost,
-            memory_cost=self.memory_cost,
-            parallelism=self.parallelism,
-            hash_len=32,
-            type=Type.ID,
-        )
+        # The two derivations share no state, and both argon2-cffi and OpenSSL's
+        # PBKDF2 release the GIL, so compute the auth hash (stored server-side)
+        # on a worker thread while the master key (never stored) is derived here
+        auth_future = _KDF_POOL.submit(self._derive, secret, auth_salt)
+        master_key = self._derive(secret, key_salt)
         
-        return auth_hash, master_key
+        return auth_future.result(), master_key
     
-    def verify_auth_hash(self, stored_hash: bytes, password: str, auth_salt: bytes) -> bool:
+    def verify_auth_hash(
+        self,
+        stored_hash: bytes,
+        password: Union[str, bytes],
+        auth_salt: bytes,
+    ) -> bool:
         """
         Verify password against stored auth hash.
         
         Args:
             stored_hash: Stored authentication hash
-            password: Password to verify
+            password: Password to verify (str, or already UTF-8 encoded bytes)
             auth_salt: Salt used for auth hash
         
         Returns:
             True if password matches
         """
-        computed_hash = hash_secret_raw(
-            secret=password.encode("utf-8"),
-            salt=auth_salt,
-            time_cost=self.time_cost,
-            memory_cost=self.memory_cost,
-            parallelism=self.parallelism,
-            hash_len=32,
-            type=Type.ID,
-        )
-        return secrets.compare_digest(stored_hash, computed_hash)
+        if len(stored_hash) != 32:
+            # Derived hashes are always 32 bytes; don't spend a KDF run on a bad record
+            return False
+        
+        if isinstance(password, str):
+            password = password.encode("utf-8")
+        computed_hash = self._derive(password, auth_salt)
+        return hmac.compare_digest(stored_hash, computed_hash)
     
-    def derive_file_key(self, master_key: bytes, salt: bytes, info: bytes = b"file") -> bytes:
+    def unlock(
+        self,
+        stored_hash: bytes,
+        password: str,
+        auth_salt: bytes,
+        key_salt: bytes,
+    ) -> Optional[bytes]:
+        """
+        Verify password and derive the master key in one pass.
+        
+        Login used to verify the auth hash and then call derive_keys, running the
+        auth derivation twice. Here the password is encoded once and the auth
+        hash and master key are derived concurrently.
+        
+        Args:
+            stored_hash: Stored authentication hash
+            password: Password to verify
+            auth_salt: Salt used for auth hash
+            key_salt: Salt for master encryption key
+        
+        Returns:
+            Master key, or None if the password does not match
+        """
+        if len(stored_hash) != 32:
+            return None
+        
+        secret = password.encode("utf-8")
+        
+        auth_future = _KDF_POOL.submit(self._derive, secret, auth_salt)
+        master_key = self._derive(secret, key_salt)
+        
+        if not hmac.compare_digest(stored_hash, auth_future.result()):
+            return None
+        return master_key
+    
+    def derive_file_key(
+        self,
+        master_key: bytes,
+        salt: bytes,
+        info: bytes = b"file",
+        algorithm: str = ALGORITHM_AES_GCM_BLAKE2B,
+    ) -> bytes:
         """
         Derive a file-specific encryption key from master key.
         
         Args:
             master_key: Master encryption key
             salt: Random salt for this file
-            info: Context info for key derivation
+            info: Context info for key derivation (at most 16 bytes for BLAKE2b)
+            algorithm: Blob algorithm selecting the KDF (BLAKE2b or legacy HKDF-SHA256)
         
         Returns:
             32-byte file encryption key
+        
+        Raises:
+            EncryptionError: If the algorithm is not supported
         """
-        hkdf = HKDF(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            info=info,
-        )
-        return hkdf.derive(master_key)
+        if algorithm == ALGORITHM_AES_GCM_BLAKE2B:
+            return _blake2b_kdf(master_key, salt, info)
+        if algorithm == ALGORITHM_AES_GCM_HKDF:
+            return _cached_hkdf_sha256(master_key, salt, info)
+        raise EncryptionError(f"Unsupported algorithm: {algorithm}")
     
     def encrypt(self, plaintext: bytes, master_key: bytes) -> EncryptedBlob:
         """
@@ -145,10 +438,10 @@ class CryptoService:
             salt = self.generate_salt()
             
             # Derive file-specific key
-            file_key = self.derive_file_key(master_key, salt)
+            file_key = _blake2b_kdf(master_key, salt, b"file")
             
             # Generate random nonce (12 bytes for GCM)
-            nonce = os.urandom(12)
+            nonce = _ENTROPY.take(12)
             
             # Encrypt with AES-256-GCM
             aesgcm = AESGCM(file_key)
@@ -160,11 +453,108 @@ class CryptoService:
             return EncryptedBlob(
                 data=encrypted_data,
                 salt=salt,
-                algorithm="AES-256-GCM",
+                algorithm=ALGORITHM_AES_GCM_BLAKE2B,
             )
         except Exception as e:
             raise EncryptionError(f"Encryption failed: {e}")
     
+    def encrypt_into(
+        self,
+        plaintext: Union[bytes, memoryview],
+        master_key: bytes,
+        out: Union[BinaryIO, bytearray],
+        buf: Optional[Union[bytearray, memoryview]] = None,
+        salt: Optional[bytes] = None,
+    ) -> bytes:
+        """
+        Encrypt data with AES-256-GCM directly into a buffer or file.
+        
+        Produces the same nonce + ciphertext + tag layout as EncryptedBlob.data.
+        A bytearray is resized (a no-op if preallocated to len(plaintext) + 28)
+        and filled in place; a file is written in chunks from a reusable
+        buffer, so the ciphertext is never held in memory whole.
+        
+        Args:
+            plaintext: Data to encrypt
+            master_key: Master encryption key
+            out: Bytearray or binary file to write to
+            buf: Reusable writable chunk buffer for file output (allocated if not given)
+            salt: Salt to derive the file key from (generated if not given)
+        
+        Returns:
+            Salt to store with the output (algorithm ALGORITHM_AES_GCM_BLAKE2B)
+        
+        Raises:
+            EncryptionError: If encryption fails
+        """
+        try:
+            if salt is None:
+                salt = self.generate_salt()
+            file_key = _blake2b_kdf(master_key, salt, b"file")
+            nonce = _ENTROPY.take(12)
+            encryptor = Cipher(algorithms.AES(file_key), modes.GCM(nonce)).encryptor()
+            data = memoryview(plaintext)
+            
+            if isinstance(out, bytearray):
+                size = 12 + len(data) + 16
+                del out[size:]
+                if len(out) < size:
+                    out.extend(bytes(size - len(out)))
+                out[:12] = nonce
+                # The 16 tag bytes double as update_into's block_size - 1 headroom
+                encryptor.update_into(data, memoryview(out)[12:])
+                encryptor.finalize()
+                out[-16:] = encryptor.tag
+                return salt
+            
+            if buf is None:
+                buf = bytearray(STREAM_CHUNK_SIZE + 15)
+            chunk_size = len(buf) - 15
+            view = memoryview(buf)
+            
+            out.write(nonce)
+            for offset in range(0, len(data), chunk_size):
+                n = encryptor.update_into(data[offset:offset + chunk_size], buf)
+                out.write(view[:n])
+            encryptor.finalize()
+            out.write(encryptor.tag)
+            return salt
+        except Exception as e:
+            raise EncryptionError(f"Encryption failed: {e}")
+    
+    def encrypt_many(self, plaintexts: Sequence[bytes], master_key: bytes) -> List[EncryptedBlob]:
+        """
+        Encrypt several small payloads under one derived file key.
+        
+        The blobs share a salt (and so a file key) but each gets its own random
+        nonce, so the key derivation and cipher setup are paid once per batch.
+        
+        Args:
+            plaintexts: Data to encrypt
+            master_key: Master encryption key
+        
+        Returns:
+            EncryptedBlobs, in input order
+        
+        Raises:
+            EncryptionError: If encryption fails
+        """
+        try:
+            salt = self.generate_salt()
+            aesgcm = AESGCM(_blake2b_kdf(master_key, salt, b"file"))
+            
+            blobs = []
+            for plaintext in plaintexts:
+                nonce = _ENTROPY.take(12)
+                blobs.append(EncryptedBlob(
+                    data=nonce + aesgcm.encrypt(nonce, plaintext, None),
+                    salt=salt,
+                    algorithm=ALGORITHM_AES_GCM_BLAKE2B,
+                ))
+            return blobs
+        except Exception as e:
+            raise EncryptionError(f"Encryption failed: {e}")
+    
     def decrypt(self, blob: EncryptedBlob, master_key: bytes) -> bytes:
         """
         Decrypt data with AES-256-GCM.
@@ -180,21 +570,90 @@ class CryptoService:
             EncryptionError: If decryption fails
         """
         try:
-            # Derive file-specific key
-            file_key = self.derive_file_key(master_key, blob.salt)
+            # Look up (or derive) the file-specific cipher
+            cache_key = (_cache_tag(master_key, blob.salt), blob.algorithm)
+            aesgcm = _CIPHERS.get(cache_key)
+            if aesgcm is None:
+                aesgcm = AESGCM(
+                    self.derive_file_key(master_key, blob.salt, algorithm=blob.algorithm)
+                )
+                _CIPHERS.put(cache_key, aesgcm)
             
             # Extract nonce and ciphertext
             nonce = blob.data[:12]
             ciphertext = blob.data[12:]
             
             # Decrypt with AES-256-GCM
-            aesgcm = AESGCM(file_key)
             plaintext = aesgcm.decrypt(nonce, ciphertext, None)
             
             return plaintext
         except Exception as e:
             raise EncryptionError(f"Decryption failed: {e}")
     
+    def decrypt_into(
+        self,
+        blob: EncryptedBlob,
+        master_key: bytes,
+        out: Union[BinaryIO, bytearray],
+        buf: Optional[Union[bytearray, memoryview]] = None,
+    ) -> int:
+        """
+        Decrypt data with AES-256-GCM directly into a buffer or file.
+        
+        A bytearray is resized to hold the plaintext and filled in place. A file
+        is written in chunks from a reusable buffer. Plaintext is produced before
+        the tag is verified; if this raises, the caller must discard whatever
+        was written to out.
+        
+        Args:
+            blob: EncryptedBlob to decrypt
+            master_key: Master encryption key
+            out: Bytearray or binary file to write plaintext to
+            buf: Reusable writable chunk buffer for file output, e.g. a
+                SecureBuffer view (allocated if not given)
+        
+        Returns:
+            Number of plaintext bytes written
+        
+        Raises:
+            EncryptionError: If decryption or authentication fails
+        """
+        try:
+            file_key = self.derive_file_key(master_key, blob.salt, algorithm=blob.algorithm)
+            
+            data = memoryview(blob.data)
+            nonce, ciphertext, tag = data[:12], data[12:-16], data[-16:]
+            decryptor = Cipher(
+                algorithms.AES(file_key),
+                modes.GCM(bytes(nonce), bytes(tag)),
+            ).decryptor()
+            
+            # update_into needs block_size - 1 bytes of headroom in the output
+            if isinstance(out, bytearray):
+                size = len(ciphertext) + 15
+                if len(out) < size:
+                    out.extend(bytes(size - len(out)))
+                written = decryptor.update_into(ciphertext, out)
+                decryptor.finalize()
+                del out[written:]
+                return written
+            
+            if buf is None:
+                buf = bytearray(STREAM_CHUNK_SIZE + 15)
+            chunk_size = len(buf) - 15
+            view = memoryview(buf)
+            
+            written = 0
+            for offset in range(0, len(ciphertext), chunk_size):
+                n = decryptor.update_into(ciphertext[offset:offset + chunk_size], buf)
+                out.write(view[:n])
+                written += n
+            
+            decryptor.finalize()
+            return written
+        except Exception as e:
+            raise EncryptionError(f"Decryption failed: {e}")
+    
     def encrypt_metadata(self, metadata: dict, master_key: bytes) -> EncryptedBlob:
         """
         Encrypt metadata as JSON.
@@ -206,9 +665,29 @@ class CryptoService:
         Returns:
             EncryptedBlob with encrypted metadata
         """
-        import json
-        plaintext = json.dumps(metadata).encode("utf-8")
-        return self.encrypt(plaintext, master_key)
+        return self.encrypt(fastjson.dumps(metadata), master_key)
+    
+    def encrypt_metadata_many(
+        self,
+        metadata: dict,
+        attachments: Sequence[bytes],
+        master_key: bytes,
+    ) -> List[EncryptedBlob]:
+        """
+        Encrypt metadata as JSON together with related small payloads.
+        
+        Everything goes through encrypt_many, so one file key and cipher serve
+        the whole record (e.g. metadata plus its prompt bloom filter).
+        
+        Args:
+            metadata: Metadata dictionary
+            attachments: Other payloads to encrypt alongside it
+            master_key: Master encryption key
+        
+        Returns:
+            EncryptedBlobs: the metadata first, then the attachments in order
+        """
+        return self.encrypt_many([fastjson.dumps(metadata), *attachments], master_key)
     
     def decrypt_metadata(self, blob: EncryptedBlob, master_key: bytes) -> dict:
         """
@@ -221,7 +700,5 @@ class CryptoService:
         Returns:
             Metadata dictionary
         """
-        import json
-        plaintext = self.decrypt(blob, master_key)
-        return json.loads(plaintext.decode("utf-8"))
+        return fastjson.loads(self.decrypt(blob, master_key))
 
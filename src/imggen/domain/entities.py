@@ -4,6 +4,7 @@ from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, Field
 
+from .clock import utcnow_dt
 from .value_objects import ImageMetadata, EncryptedBlob
 
 
@@ -15,7 +16,7 @@ class User(BaseModel):
     auth_salt: bytes = Field(..., description="Salt for authentication")
     key_salt: bytes = Field(..., description="Salt for master key derivation")
     auth_hash: bytes = Field(..., description="Authentication hash")
-    created_at: datetime = Field(default_factory=datetime.utcnow, description="Creation timestamp")
+    created_at: datetime = Field(default_factory=utcnow_dt, description="Creation timestamp")
     
     model_config = {"frozen": False}
 
@@ -28,9 +29,13 @@ class Image(BaseModel):
     vault_path: str = Field(..., description="Path to encrypted image file")
     metadata_blob: EncryptedBlob = Field(..., description="Encrypted metadata")
     thumbnail_blob: Optional[EncryptedBlob] = Field(default=None, description="Encrypted thumbnail")
-    created_at: datetime = Field(default_factory=datetime.utcnow, description="Creation timestamp")
+    prompt_bloom: Optional[EncryptedBlob] = Field(
+        default=None, description="Encrypted prompt trigram bloom filter"
+    )
+    created_at: datetime = Field(default_factory=utcnow_dt, description="Creation timestamp")
     
-    model_config = {"frozen": False}
+    # EncryptedBlob.data may be a memoryview, which Pydantic has no schema for
+    model_config = {"frozen": False, "arbitrary_types_allowed": True}
 
 
 class Vault(BaseModel):
@@ -42,7 +47,8 @@ class Vault(BaseModel):
     encrypted_data: EncryptedBlob = Field(..., description="Encrypted file data")
     file_type: str = Field(..., description="File type (image, metadata, etc)")
     size_bytes: int = Field(..., description="Encrypted size in bytes")
-    created_at: datetime = Field(default_factory=datetime.utcnow, description="Creation timestamp")
+    created_at: datetime = Field(default_factory=utcnow_dt, description="Creation timestamp")
     
-    model_config = {"frozen": False}
+    # EncryptedBlob.data may be a memoryview, which Pydantic has no schema for
+    model_config = {"frozen": False, "arbitrary_types_allowed": True}
 
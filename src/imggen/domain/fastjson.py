@@ -0,0 +1,17 @@
+"""JSON encoding on orjson when the optional "fast" extra is installed."""
+
+from typing import Any
+
+try:
+    import orjson
+    
+    dumps = orjson.dumps
+    loads = orjson.loads
+except ImportError:
+    import json
+    
+    def dumps(obj: Any) -> bytes:
+        """Serialize obj to compact UTF-8 JSON bytes, like orjson.dumps."""
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    
+    loads = json.loads
@@ -55,6 +55,10 @@ MODELS: Dict[ModelSize, ModelConfig] = {
 }
 
 
+# Lowercase size name -> config, for CLI lookups without building the enum
+_MODELS_BY_NAME: Dict[str, ModelConfig] = {size.value: config for size, config in MODELS.items()}
+
+
 def get_model_config(size: ModelSize) -> ModelConfig:
     """Get configuration for a model size."""
     return MODELS[size]
@@ -62,9 +66,8 @@ def get_model_config(size: ModelSize) -> ModelConfig:
 
 def get_model_by_name(name: str) -> ModelConfig:
     """Get model configuration by size name."""
-    try:
-        size = ModelSize(name.lower())
-        return MODELS[size]
-    except (ValueError, KeyError):
+    config = _MODELS_BY_NAME.get(name.lower())
+    if config is None:
         raise ValueError(f"Invalid model size: {name}. Choose from: small, medium, large")
+    return config
 
@@ -1,18 +1,27 @@
 """Domain value objects - immutable data structures."""
 
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any
 from pydantic import BaseModel, Field
 
+from .clock import utcnow_dt
 
-class EncryptedBlob(BaseModel):
-    """Encrypted data blob with metadata."""
+
+# Internal value objects are plain slotted dataclasses: they are built on every
+# row read and encrypt call from trusted data, so they skip Pydantic validation.
+@dataclass(slots=True, frozen=True, kw_only=True)
+class EncryptedBlob:
+    """
+    Encrypted data blob with metadata.
     
-    data: bytes = Field(..., description="Encrypted data (nonce + ciphertext + tag)")
-    salt: bytes = Field(..., description="Salt used for key derivation")
-    algorithm: str = Field(default="AES-256-GCM", description="Encryption algorithm")
+    salt and algorithm are stored in the clear but still authenticated: both
+    select the file key, so changing either makes the GCM tag check fail.
+    """
     
-    model_config = {"frozen": True}
+    data: bytes | memoryview  # Encrypted data (nonce + ciphertext + tag)
+    salt: bytes  # Salt used for key derivation
+    algorithm: str = "AES-256-GCM"  # Encryption algorithm
 
 
 class ImageMetadata(BaseModel):
@@ -28,30 +37,59 @@ class ImageMetadata(BaseModel):
     sampler: str = Field(default="DPM++ 2M Karras", description="Sampler name")
     model: str = Field(default="SDXL Base", description="Model name")
     provider: str = Field(..., description="GPU provider used")
-    created_at: datetime = Field(default_factory=datetime.utcnow, description="Creation time")
+    created_at: datetime = Field(default_factory=utcnow_dt, description="Creation time")
     
     model_config = {"frozen": True}
+    
+    def to_storage_dict(self) -> dict[str, Any]:
+        """
+        Get a JSON-ready dict of the fields (ISO-formatted created_at).
+        
+        Also includes prompt_lower so search can match without lowercasing
+        every prompt or building the model.
+        """
+        data = dict(self.__dict__)
+        data["created_at"] = self.created_at.isoformat()
+        data["prompt_lower"] = self.prompt.lower()
+        return data
+    
+    @classmethod
+    def from_storage_dict(cls, data: dict[str, Any]) -> "ImageMetadata":
+        """
+        Rebuild metadata written by to_storage_dict without re-validating it.
+        
+        Only for trusted data (decrypted from our own storage); missing fields
+        with defaults are filled in, but nothing is type-checked.
+        """
+        fields = dict(data)
+        fields.pop("prompt_lower", None)
+        created_at = fields.get("created_at")
+        if isinstance(created_at, str):
+            fields["created_at"] = datetime.fromisoformat(created_at)
+        return cls.model_construct(**fields)
 
 
-class UserCredentials(BaseModel):
+@dataclass(slots=True, frozen=True, kw_only=True)
+class UserCredentials:
     """User authentication credentials."""
     
-    username: str = Field(..., min_length=3, max_length=50, description="Username")
-    auth_salt: bytes = Field(..., description="Salt for auth hash")
-    key_salt: bytes = Field(..., description="Salt for master key")
-    auth_hash: bytes = Field(..., description="Hashed password for authentication")
+    username: str  # Username (3-50 characters)
+    auth_salt: bytes  # Salt for auth hash
+    key_salt: bytes  # Salt for master key
+    auth_hash: bytes  # Hashed password for authentication
     
-    model_config = {"frozen": True}
+    def __post_init__(self) -> None:
+        if not 3 <= len(self.username) <= 50:
+            raise ValueError("Username must be between 3 and 50 characters")
 
 
-class SessionInfo(BaseModel):
+@dataclass(slots=True, frozen=True, kw_only=True)
+class SessionInfo:
     """Session information."""
     
-    user_id: int = Field(..., description="User ID")
-    username: str = Field(..., description="Username")
-    master_key: bytes = Field(..., description="Master encryption key")
-    created_at: datetime = Field(default_factory=datetime.utcnow, description="Session start time")
-    expires_at: datetime = Field(..., description="Session expiration time")
-    
-    model_config = {"frozen": True}
+    user_id: int  # User ID
+    username: str  # Username
+    master_key: bytes  # Master encryption key
+    expires_at: datetime  # Session expiration time
+    created_at: datetime = field(default_factory=utcnow_dt)  # Session start time
 
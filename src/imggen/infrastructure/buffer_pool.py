@@ -0,0 +1,52 @@
+"""Pool of reusable IO buffers."""
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from imggen.domain.crypto import STREAM_CHUNK_SIZE, SecureBuffer
+
+
+class BufferPool:
+    """
+    Thread-safe pool of fixed-size SecureBuffers.
+    
+    Lets concurrent streaming operations reuse a bounded set of buffers
+    instead of allocating fresh ones per call. Buffers hold plaintext, so
+    they are locked in memory and wiped whenever they are returned.
+    """
+    
+    def __init__(self, buffer_size: int, max_buffers: int = 8):
+        self.buffer_size = buffer_size
+        self.max_buffers = max_buffers
+        self._free: List[SecureBuffer] = []
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> SecureBuffer:
+        """Take a buffer from the pool (or allocate one if empty)."""
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+        return SecureBuffer(self.buffer_size)
+    
+    def release(self, buf: SecureBuffer) -> None:
+        """Wipe a buffer and return it to the pool (or free it if the pool is full)."""
+        buf.wipe()
+        with self._lock:
+            if buf.size == self.buffer_size and len(self._free) < self.max_buffers:
+                self._free.append(buf)
+                return
+        buf.close()
+    
+    @contextmanager
+    def buffer(self) -> Iterator[memoryview]:
+        """Rent a buffer's view for the duration of a with-block."""
+        buf = self.acquire()
+        try:
+            yield buf.view
+        finally:
+            self.release(buf)
+
+
+# Shared pool sized for CryptoService.decrypt_into (chunk + AES block headroom)
+stream_buffers = BufferPool(STREAM_CHUNK_SIZE + 15)
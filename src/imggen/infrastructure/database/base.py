@@ -1,9 +1,10 @@
 """Abstract repository interfaces."""
 
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from typing import Iterator, Optional, List, Sequence, Tuple
 
 from imggen.domain.entities import User, Image
+from imggen.domain.value_objects import EncryptedBlob
 
 
 class UserRepository(ABC):
@@ -38,16 +39,47 @@ class ImageRepository(ABC):
         """Create a new image record."""
         pass
     
+    @abstractmethod
+    def create_many(self, images: List[Image]) -> List[Image]:
+        """Create several image records in a single transaction."""
+        pass
+    
     @abstractmethod
     def get_by_id(self, image_id: int, user_id: int) -> Optional[Image]:
         """Get image by ID (filtered by user_id)."""
         pass
     
+    @abstractmethod
+    def get_many(self, image_ids: Sequence[int], user_id: int) -> List[Image]:
+        """Get several images by ID (filtered by user_id; missing IDs are skipped)."""
+        pass
+    
+    @abstractmethod
+    def iter_prompt_blooms(self, user_id: int) -> Iterator[Tuple[int, Optional[EncryptedBlob]]]:
+        """Iterate over (image ID, encrypted prompt bloom) pairs for a user, newest first."""
+        pass
+    
     @abstractmethod
     def list_by_user(self, user_id: int, limit: int = 100, offset: int = 0) -> List[Image]:
         """List images for a user."""
         pass
     
+    @abstractmethod
+    def iter_by_user(
+        self,
+        user_id: int,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after_id: Optional[int] = None,
+    ) -> Iterator[Image]:
+        """
+        Iterate over a user's images, newest first, without loading them all.
+        
+        after_id starts after that image (keyset pagination), so deep pages
+        cost the same as the first one.
+        """
+        pass
+    
     @abstractmethod
     def delete(self, image_id: int, user_id: int) -> bool:
         """Delete an image."""
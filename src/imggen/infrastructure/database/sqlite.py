@@ -1,89 +1,196 @@
 """SQLite database implementation."""
 
 import sqlite3
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List
+from typing import Iterator, Optional, List, Sequence, Tuple
 from datetime import datetime
 
+from imggen.domain.clock import from_unix_micros, to_unix_micros
 from imggen.domain.entities import User, Image
 from imggen.domain.value_objects import EncryptedBlob
 from .base import UserRepository, ImageRepository
 
+# Applied once to each long-lived connection
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Stored in PRAGMA user_version once init_db has brought a database up to
+# date; bump it whenever init_db gains a table, column, index or migration
+SCHEMA_VERSION = 1
+
+# Rows fetched per round trip when reading image lists
+FETCH_BATCH_SIZE = 256
+
+# IDs bound per "IN (...)" query (older SQLite builds allow 999 parameters)
+MAX_IN_PARAMS = 500
+
+
+# Table definitions; {name} lets migrations build a replacement table
+USERS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        auth_salt BLOB NOT NULL,
+        key_salt BLOB NOT NULL,
+        auth_hash BLOB NOT NULL,
+        created_at INTEGER NOT NULL
+    )
+"""
+
+IMAGES_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        vault_path TEXT NOT NULL,
+        metadata_data BLOB NOT NULL,
+        metadata_salt BLOB NOT NULL,
+        metadata_algorithm TEXT NOT NULL,
+        thumbnail_data BLOB,
+        thumbnail_salt BLOB,
+        thumbnail_algorithm TEXT,
+        created_at INTEGER NOT NULL,
+        prompt_bloom_data BLOB,
+        prompt_bloom_salt BLOB,
+        prompt_bloom_algorithm TEXT,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+    )
+"""
+
+
+def _migrate_created_at(cursor: sqlite3.Cursor, table: str, schema: str) -> None:
+    """Rebuild a table whose created_at is ISO TEXT with INTEGER Unix microseconds."""
+    columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+    column_list = ", ".join(columns)
+    
+    # SQLite cannot change a column's type in place: copy into a new table,
+    # drop the old one, then rename (in this order so foreign keys that
+    # reference the table keep pointing at its name)
+    cursor.execute(schema.format(name=f"{table}_new"))
+    cursor.execute(f"INSERT INTO {table}_new ({column_list}) SELECT {column_list} FROM {table}")
+    rows = cursor.execute(f"SELECT id, created_at FROM {table}_new").fetchall()
+    cursor.executemany(
+        f"UPDATE {table}_new SET created_at = ? WHERE id = ?",
+        [(to_unix_micros(datetime.fromisoformat(created_at)), row_id) for row_id, created_at in rows],
+    )
+    cursor.execute(f"DROP TABLE {table}")
+    cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+
 
 def init_db(db_path: Path) -> None:
     """Initialize database schema."""
     conn = sqlite3.connect(db_path)
+    
+    # Databases already at SCHEMA_VERSION need no DDL or migration checks
+    if conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+        conn.close()
+        return
+    
     cursor = conn.cursor()
     
-    # Users table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            auth_salt BLOB NOT NULL,
-            key_salt BLOB NOT NULL,
-            auth_hash BLOB NOT NULL,
-            created_at TEXT NOT NULL
-        )
-    """)
-    
-    # Images table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS images (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            vault_path TEXT NOT NULL,
-            metadata_data BLOB NOT NULL,
-            metadata_salt BLOB NOT NULL,
-            metadata_algorithm TEXT NOT NULL,
-            thumbnail_data BLOB,
-            thumbnail_salt BLOB,
-            thumbnail_algorithm TEXT,
-            created_at TEXT NOT NULL,
-            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-        )
-    """)
+    # Tables
+    cursor.execute(USERS_SCHEMA.format(name="users"))
+    cursor.execute(IMAGES_SCHEMA.format(name="images"))
     
-    # Indexes
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_images_user_id ON images(user_id)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_images_created_at ON images(created_at)")
+    # Columns added after the initial schema
+    existing = {row[1] for row in cursor.execute("PRAGMA table_info(images)")}
+    for column, column_type in (
+        ("prompt_bloom_data", "BLOB"),
+        ("prompt_bloom_salt", "BLOB"),
+        ("prompt_bloom_algorithm", "TEXT"),
+    ):
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE images ADD COLUMN {column} {column_type}")
     
+    # created_at used to be stored as ISO TEXT
+    for table, schema in (("users", USERS_SCHEMA), ("images", IMAGES_SCHEMA)):
+        column_types = {row[1]: row[2] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        if column_types["created_at"] == "TEXT":
+            _migrate_created_at(cursor, table, schema)
+    
+    # Indexes: listings filter on user_id and walk (created_at, id) newest
+    # first, so one composite index serves the filter, the order and keyset
+    # pagination without a sort
+    cursor.execute("DROP INDEX IF EXISTS idx_images_user_id")
+    cursor.execute("DROP INDEX IF EXISTS idx_images_created_at")
+    cursor.execute("DROP INDEX IF EXISTS idx_images_user_created")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_images_user_created_id "
+        "ON images(user_id, created_at DESC, id DESC)"
+    )
+    
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
     conn.commit()
     conn.close()
 
 
+class ThreadLocalConnections:
+    """
+    Long-lived SQLite connections, one per thread.
+    
+    Opening a connection (and re-reading the schema) costs more than most of
+    the queries run on it, so each thread keeps its connection open.
+    """
+    
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._local = threading.local()
+    
+    def get(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+        return conn
+
+
+@lru_cache(maxsize=None)
+def _shared_connections(db_path: Path) -> ThreadLocalConnections:
+    """Get the process-wide connections for a database, shared by all repositories."""
+    return ThreadLocalConnections(db_path)
+
+
 class SQLiteUserRepository(UserRepository):
     """SQLite implementation of user repository."""
     
     def __init__(self, db_path: Path):
         self.db_path = db_path
         init_db(db_path)
+        self._connections = _shared_connections(db_path)
     
     def _get_connection(self) -> sqlite3.Connection:
-        return sqlite3.connect(self.db_path)
+        return self._connections.get()
     
     def create(self, user: User) -> User:
         """Create a new user."""
         conn = self._get_connection()
-        cursor = conn.cursor()
         
-        cursor.execute(
-            """
-            INSERT INTO users (username, auth_salt, key_salt, auth_hash, created_at)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (
-                user.username,
-                user.auth_salt,
-                user.key_salt,
-                user.auth_hash,
-                user.created_at.isoformat(),
-            ),
-        )
+        # Commits on success, rolls back on error (the connection is reused)
+        with conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO users (username, auth_salt, key_salt, auth_hash, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (
+                    user.username,
+                    user.auth_salt,
+                    user.key_salt,
+                    user.auth_hash,
+                    to_unix_micros(user.created_at),
+                ),
+            )
         
         user.id = cursor.lastrowid
-        conn.commit()
-        conn.close()
         
         return user
     
@@ -98,7 +205,6 @@ class SQLiteUserRepository(UserRepository):
         )
         
         row = cursor.fetchone()
-        conn.close()
         
         if not row:
             return None
@@ -109,7 +215,7 @@ class SQLiteUserRepository(UserRepository):
             auth_salt=row[2],
             key_salt=row[3],
             auth_hash=row[4],
-            created_at=datetime.fromisoformat(row[5]),
+            created_at=from_unix_micros(row[5]),
         )
     
     def get_by_username(self, username: str) -> Optional[User]:
@@ -123,7 +229,6 @@ class SQLiteUserRepository(UserRepository):
         )
         
         row = cursor.fetchone()
-        conn.close()
         
         if not row:
             return None
@@ -134,7 +239,7 @@ class SQLiteUserRepository(UserRepository):
             auth_salt=row[2],
             key_salt=row[3],
             auth_hash=row[4],
-            created_at=datetime.fromisoformat(row[5]),
+            created_at=from_unix_micros(row[5]),
         )
     
     def exists(self, username: str) -> bool:
@@ -148,93 +253,172 @@ class SQLiteImageRepository(ImageRepository):
     def __init__(self, db_path: Path):
         self.db_path = db_path
         init_db(db_path)
+        self._connections = _shared_connections(db_path)
     
     def _get_connection(self) -> sqlite3.Connection:
-        return sqlite3.connect(self.db_path)
+        return self._connections.get()
     
-    def create(self, image: Image) -> Image:
-        """Create a new image record."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
+    _INSERT_IMAGE = """
+        INSERT INTO images (
+            user_id, vault_path, 
+            metadata_data, metadata_salt, metadata_algorithm,
+            thumbnail_data, thumbnail_salt, thumbnail_algorithm,
+            created_at,
+            prompt_bloom_data, prompt_bloom_salt, prompt_bloom_algorithm
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    
+    @staticmethod
+    def _image_params(image: Image) -> tuple:
+        """Get INSERT parameters for an image."""
         thumbnail_data = image.thumbnail_blob.data if image.thumbnail_blob else None
         thumbnail_salt = image.thumbnail_blob.salt if image.thumbnail_blob else None
         thumbnail_algorithm = image.thumbnail_blob.algorithm if image.thumbnail_blob else None
         
-        cursor.execute(
-            """
-            INSERT INTO images (
-                user_id, vault_path, 
-                metadata_data, metadata_salt, metadata_algorithm,
-                thumbnail_data, thumbnail_salt, thumbnail_algorithm,
-                created_at
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                image.user_id,
-                image.vault_path,
-                image.metadata_blob.data,
-                image.metadata_blob.salt,
-                image.metadata_blob.algorithm,
-                thumbnail_data,
-                thumbnail_salt,
-                thumbnail_algorithm,
-                image.created_at.isoformat(),
-            ),
+        bloom_data = image.prompt_bloom.data if image.prompt_bloom else None
+        bloom_salt = image.prompt_bloom.salt if image.prompt_bloom else None
+        bloom_algorithm = image.prompt_bloom.algorithm if image.prompt_bloom else None
+        
+        return (
+            image.user_id,
+            image.vault_path,
+            image.metadata_blob.data,
+            image.metadata_blob.salt,
+            image.metadata_blob.algorithm,
+            thumbnail_data,
+            thumbnail_salt,
+            thumbnail_algorithm,
+            to_unix_micros(image.created_at),
+            bloom_data,
+            bloom_salt,
+            bloom_algorithm,
         )
+    
+    def create(self, image: Image) -> Image:
+        """Create a new image record."""
+        conn = self._get_connection()
+        
+        with conn:
+            cursor = conn.execute(self._INSERT_IMAGE, self._image_params(image))
         
         image.id = cursor.lastrowid
-        conn.commit()
-        conn.close()
         
         return image
     
+    def create_many(self, images: List[Image]) -> List[Image]:
+        """Create several image records in a single transaction."""
+        if not images:
+            return images
+        
+        conn = self._get_connection()
+        
+        with conn:
+            # IMMEDIATE takes the write lock up front, so no other connection
+            # can insert in between and the new ids are consecutive
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(self._INSERT_IMAGE, map(self._image_params, images))
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        
+        first_id = last_id - len(images) + 1
+        for offset, image in enumerate(images):
+            image.id = first_id + offset
+        
+        return images
+    
+    _SELECT_IMAGES = """
+        SELECT id, user_id, vault_path,
+               metadata_data, metadata_salt, metadata_algorithm,
+               thumbnail_data, thumbnail_salt, thumbnail_algorithm,
+               created_at,
+               prompt_bloom_data, prompt_bloom_salt, prompt_bloom_algorithm
+        FROM images
+    """
+    
+    # id breaks created_at ties so the order is total (needed for keyset pages)
+    _NEWEST_FIRST = "ORDER BY created_at DESC, id DESC "
+    
+    @staticmethod
+    def _row_to_image(row: tuple) -> Image:
+        """
+        Build an Image from a _SELECT_IMAGES row.
+        
+        Rows were validated when written, so the Image is constructed without
+        re-running Pydantic validation.
+        """
+        (
+            image_id, user_id, vault_path,
+            meta_data, meta_salt, meta_alg,
+            thumb_data, thumb_salt, thumb_alg,
+            created_at,
+            bloom_data, bloom_salt, bloom_alg,
+        ) = row
+        
+        return Image.model_construct(
+            id=image_id,
+            user_id=user_id,
+            vault_path=vault_path,
+            metadata_blob=EncryptedBlob(data=meta_data, salt=meta_salt, algorithm=meta_alg),
+            thumbnail_blob=(
+                EncryptedBlob(data=thumb_data, salt=thumb_salt, algorithm=thumb_alg)
+                if thumb_data is not None else None
+            ),
+            prompt_bloom=(
+                EncryptedBlob(data=bloom_data, salt=bloom_salt, algorithm=bloom_alg)
+                if bloom_data is not None else None
+            ),
+            created_at=from_unix_micros(created_at),
+        )
+    
     def get_by_id(self, image_id: int, user_id: int) -> Optional[Image]:
         """Get image by ID (filtered by user_id)."""
         conn = self._get_connection()
         cursor = conn.cursor()
         
         cursor.execute(
-            """
-            SELECT id, user_id, vault_path,
-                   metadata_data, metadata_salt, metadata_algorithm,
-                   thumbnail_data, thumbnail_salt, thumbnail_algorithm,
-                   created_at
-            FROM images
-            WHERE id = ? AND user_id = ?
-            """,
+            self._SELECT_IMAGES + "WHERE id = ? AND user_id = ?",
             (image_id, user_id),
         )
         
         row = cursor.fetchone()
-        conn.close()
         
         if not row:
             return None
         
-        metadata_blob = EncryptedBlob(
-            data=row[3],
-            salt=row[4],
-            algorithm=row[5],
-        )
+        return self._row_to_image(row)
+    
+    def get_many(self, image_ids: Sequence[int], user_id: int) -> List[Image]:
+        """Get several images by ID (filtered by user_id; missing IDs are skipped)."""
+        conn = self._get_connection()
         
-        thumbnail_blob = None
-        if row[6]:
-            thumbnail_blob = EncryptedBlob(
-                data=row[6],
-                salt=row[7],
-                algorithm=row[8],
+        images = []
+        for start in range(0, len(image_ids), MAX_IN_PARAMS):
+            chunk = list(image_ids[start:start + MAX_IN_PARAMS])
+            placeholders = ",".join("?" * len(chunk))
+            cursor = conn.execute(
+                self._SELECT_IMAGES + f"WHERE user_id = ? AND id IN ({placeholders})",
+                (user_id, *chunk),
             )
+            images.extend(map(self._row_to_image, cursor.fetchall()))
         
-        return Image(
-            id=row[0],
-            user_id=row[1],
-            vault_path=row[2],
-            metadata_blob=metadata_blob,
-            thumbnail_blob=thumbnail_blob,
-            created_at=datetime.fromisoformat(row[9]),
+        return images
+    
+    def iter_prompt_blooms(self, user_id: int) -> Iterator[Tuple[int, Optional[EncryptedBlob]]]:
+        """Iterate over (image ID, encrypted prompt bloom) pairs for a user, newest first."""
+        cursor = self._get_connection().execute(
+            "SELECT id, prompt_bloom_data, prompt_bloom_salt, prompt_bloom_algorithm "
+            "FROM images WHERE user_id = ? " + self._NEWEST_FIRST,
+            (user_id,),
         )
+        try:
+            for image_id, data, salt, algorithm in cursor:
+                bloom = (
+                    EncryptedBlob(data=data, salt=salt, algorithm=algorithm)
+                    if data is not None else None
+                )
+                yield image_id, bloom
+        finally:
+            cursor.close()
     
     def list_by_user(self, user_id: int, limit: int = 100, offset: int = 0) -> List[Image]:
         """List images for a user."""
@@ -242,64 +426,56 @@ class SQLiteImageRepository(ImageRepository):
         cursor = conn.cursor()
         
         cursor.execute(
-            """
-            SELECT id, user_id, vault_path,
-                   metadata_data, metadata_salt, metadata_algorithm,
-                   thumbnail_data, thumbnail_salt, thumbnail_algorithm,
-                   created_at
-            FROM images
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-            LIMIT ? OFFSET ?
-            """,
+            self._SELECT_IMAGES + "WHERE user_id = ? " + self._NEWEST_FIRST + "LIMIT ? OFFSET ?",
             (user_id, limit, offset),
         )
         
-        rows = cursor.fetchall()
-        conn.close()
-        
         images = []
-        for row in rows:
-            metadata_blob = EncryptedBlob(
-                data=row[3],
-                salt=row[4],
-                algorithm=row[5],
-            )
-            
-            thumbnail_blob = None
-            if row[6]:
-                thumbnail_blob = EncryptedBlob(
-                    data=row[6],
-                    salt=row[7],
-                    algorithm=row[8],
-                )
-            
-            images.append(
-                Image(
-                    id=row[0],
-                    user_id=row[1],
-                    vault_path=row[2],
-                    metadata_blob=metadata_blob,
-                    thumbnail_blob=thumbnail_blob,
-                    created_at=datetime.fromisoformat(row[9]),
-                )
-            )
+        while rows := cursor.fetchmany(FETCH_BATCH_SIZE):
+            images.extend(self._row_to_image(row) for row in rows)
         
         return images
     
+    def iter_by_user(
+        self,
+        user_id: int,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after_id: Optional[int] = None,
+    ) -> Iterator[Image]:
+        """Iterate over a user's images, newest first, fetching rows lazily."""
+        sql = self._SELECT_IMAGES + "WHERE user_id = ? "
+        params: list = [user_id]
+        if after_id is not None:
+            # Seek past the given image in index order instead of counting rows
+            sql += (
+                "AND (created_at, id) < "
+                "(SELECT created_at, id FROM images WHERE id = ? AND user_id = ?) "
+            )
+            params += [after_id, user_id]
+        
+        # LIMIT -1 means no limit in SQLite
+        cursor = self._get_connection().execute(
+            sql + self._NEWEST_FIRST + "LIMIT ? OFFSET ?",
+            (*params, -1 if limit is None else limit, offset),
+        )
+        try:
+            for row in cursor:
+                yield self._row_to_image(row)
+        finally:
+            cursor.close()
+    
     def delete(self, image_id: int, user_id: int) -> bool:
         """Delete an image."""
         conn = self._get_connection()
-        cursor = conn.cursor()
         
-        cursor.execute(
-            "DELETE FROM images WHERE id = ? AND user_id = ?",
-            (image_id, user_id),
-        )
+        with conn:
+            cursor = conn.execute(
+                "DELETE FROM images WHERE id = ? AND user_id = ?",
+                (image_id, user_id),
+            )
         
         deleted = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
         
         return deleted
     
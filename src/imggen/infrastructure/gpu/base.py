@@ -1,12 +1,19 @@
 """Abstract GPU provider interface."""
 
 from abc import ABC, abstractmethod
-from typing import Optional
+import asyncio
+from secrets import randbits
+from typing import List, Optional
 
 
 class GPUProvider(ABC):
     """Abstract GPU provider for image generation."""
     
+    @property
+    def name(self) -> str:
+        """Provider name recorded in image metadata."""
+        return self.__class__.__name__
+    
     @abstractmethod
     async def generate(
         self,
@@ -38,6 +45,75 @@ class GPUProvider(ABC):
         """
         pass
     
+    async def generate_batch(
+        self,
+        prompt: str,
+        count: int,
+        negative_prompt: str = "",
+        width: int = 1024,
+        height: int = 1024,
+        steps: int = 25,
+        cfg_scale: float = 7.0,
+        seed: Optional[int] = None,
+    ) -> List[bytes]:
+        """
+        Generate several images of one prompt and return their PNG bytes.
+        
+        Seed contract (every provider follows it): the images are split into
+        consecutive runs of at most max_batch_size(width, height), and the
+        run starting at image i is sampled with seed + i. With the default
+        run size of 1, image i is exactly generate(..., seed=seed + i);
+        providers that sample a latent batch per run override
+        max_batch_size and this method. Either way the same
+        (prompt, count, seed, size) reproduces the same images on a provider.
+        When seed is None one random base seed is drawn for the whole batch.
+        
+        Args:
+            prompt: Generation prompt
+            count: Number of images
+            negative_prompt: Negative prompt
+            width: Image width
+            height: Image height
+            steps: Sampling steps
+            cfg_scale: CFG scale
+            seed: Base random seed (None for random)
+        
+        Returns:
+            PNG image bytes, one per image
+        
+        Raises:
+            GenerationError: If generation fails
+        """
+        if seed is None:
+            seed = randbits(32)
+        
+        images = await asyncio.gather(*(
+            self.generate(
+                prompt=prompt,
+                negative_prompt=negative_prompt,
+                width=width,
+                height=height,
+                steps=steps,
+                cfg_scale=cfg_scale,
+                seed=seed + i,
+            )
+            for i in range(count)
+        ))
+        return list(images)
+    
+    def max_batch_size(self, width: int, height: int) -> int:
+        """
+        Largest number of images sampled together in one generate_batch run.
+        
+        Args:
+            width: Image width
+            height: Image height
+        
+        Returns:
+            Run size (1 - one image per run - by default)
+        """
+        return 1
+    
     async def img2img(
         self,
         input_image: bytes,
@@ -68,6 +144,9 @@ class GPUProvider(ABC):
         """
         raise NotImplementedError("This provider does not support img2img")
     
+    async def aclose(self) -> None:
+        """Release any connections held by the provider (no-op by default)."""
+    
     @abstractmethod
     async def health_check(self) -> bool:
         """
@@ -0,0 +1,107 @@
+"""GPU provider decorator that caches health checks."""
+
+import time
+from typing import List, Optional
+from .base import GPUProvider
+
+
+class HealthCachingProvider(GPUProvider):
+    """
+    Wrap a GPU provider and reuse a successful health check for a short TTL.
+    
+    Only healthy results are cached, so a provider that comes back up is
+    noticed on the next call.
+    """
+    
+    def __init__(self, provider: GPUProvider, cache_ttl: float = 2.0):
+        self.provider = provider
+        self._cache_ttl = cache_ttl
+        self._last_ok_at: Optional[float] = None
+    
+    @property
+    def name(self) -> str:
+        """Name of the wrapped provider."""
+        return self.provider.name
+    
+    async def generate(
+        self,
+        prompt: str,
+        negative_prompt: str = "",
+        width: int = 1024,
+        height: int = 1024,
+        steps: int = 25,
+        cfg_scale: float = 7.0,
+        seed: Optional[int] = None,
+    ) -> bytes:
+        """Generate an image with the wrapped provider."""
+        return await self.provider.generate(
+            prompt=prompt,
+            negative_prompt=negative_prompt,
+            width=width,
+            height=height,
+            steps=steps,
+            cfg_scale=cfg_scale,
+            seed=seed,
+        )
+    
+    async def generate_batch(
+        self,
+        prompt: str,
+        count: int,
+        negative_prompt: str = "",
+        width: int = 1024,
+        height: int = 1024,
+        steps: int = 25,
+        cfg_scale: float = 7.0,
+        seed: Optional[int] = None,
+    ) -> List[bytes]:
+        """Generate several images with the wrapped provider."""
+        return await self.provider.generate_batch(
+            prompt=prompt,
+            count=count,
+            negative_prompt=negative_prompt,
+            width=width,
+            height=height,
+            steps=steps,
+            cfg_scale=cfg_scale,
+            seed=seed,
+        )
+    
+    def max_batch_size(self, width: int, height: int) -> int:
+        """Run size of the wrapped provider."""
+        return self.provider.max_batch_size(width, height)
+    
+    async def img2img(
+        self,
+        input_image: bytes,
+        prompt: str,
+        strength: float = 0.75,
+        negative_prompt: str = "",
+        steps: int = 25,
+        cfg_scale: float = 7.0,
+        seed: Optional[int] = None,
+    ) -> bytes:
+        """Transform an image with the wrapped provider."""
+        return await self.provider.img2img(
+            input_image=input_image,
+            prompt=prompt,
+            strength=strength,
+            negative_prompt=negative_prompt,
+            steps=steps,
+            cfg_scale=cfg_scale,
+            seed=seed,
+        )
+    
+    async def health_check(self) -> bool:
+        """Check provider health, skipping the request if it was healthy within the TTL."""
+        now = time.monotonic()
+        if self._last_ok_at is not None and now - self._last_ok_at < self._cache_ttl:
+            return True
+        
+        healthy = await self.provider.health_check()
+        self._last_ok_at = now if healthy else None
+        return healthy
+    
+    async def aclose(self) -> None:
+        """Close the wrapped provider."""
+        await self.provider.aclose()
@@ -1,18 +1,36 @@
 """ComfyUI local GPU provider."""
 
 import asyncio
-import json
-import random
+import time
 import uuid
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any
+from secrets import randbits
+from typing import Optional, Dict, Any, List
 import httpx
-import websockets
 
+from imggen.domain import fastjson
 from imggen.domain.exceptions import GenerationError
 from imggen.domain.models import get_model_by_name, ModelSize, MODELS
 from .base import GPUProvider
 
+# Backoff (seconds) between /history polls while a prompt is running
+HISTORY_POLL_INITIAL = 0.25
+HISTORY_POLL_MAX = 2.0
+
+# Cap on simultaneous /view downloads when a workflow outputs several images
+MAX_CONCURRENT_DOWNLOADS = 8
+
+# Workflow templates are kept as serialized JSON: parsing gives each request its
+# own copy to patch, faster than deep-copying the nested dict
+_DEFAULT_WORKFLOWS: Dict[str, bytes] = {}
+
+
+@lru_cache(maxsize=8)
+def _read_workflow_file(path: Path, mtime: float) -> bytes:
+    """Read a workflow file (cached until its modification time changes)."""
+    return path.read_bytes()
+
 
 class ComfyUIProvider(GPUProvider):
     """
@@ -33,15 +51,42 @@ class ComfyUIProvider(GPUProvider):
         self.workflow_path = workflow_path
         self.model_size = model_size
         self.client_id = str(uuid.uuid4())
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Get the shared HTTP client, creating it on first use.
+        
+        Created lazily so it binds to the running event loop; reusing it keeps
+        the connection to ComfyUI alive across queue, history and download calls.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_keepalive_connections=16, keepalive_expiry=60),
+            )
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the shared HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     def _load_workflow(self) -> Dict[str, Any]:
-        """Load workflow template."""
+        """Load a fresh, patchable copy of the workflow template."""
         if self.workflow_path and self.workflow_path.exists():
-            with open(self.workflow_path, "r") as f:
-                return json.load(f)
+            return fastjson.loads(
+                _read_workflow_file(self.workflow_path, self.workflow_path.stat().st_mtime)
+            )
         
         # Return default workflow based on model size
-        return self._get_default_workflow()
+        template = _DEFAULT_WORKFLOWS.get(self.model_size)
+        if template is None:
+            template = fastjson.dumps(self._get_default_workflow())
+            _DEFAULT_WORKFLOWS[self.model_size] = template
+        return fastjson.loads(template)
     
     def _get_default_workflow(self) -> Dict[str, Any]:
         """Get default workflow based on model size."""
@@ -116,25 +161,91 @@ class ComfyUIProvider(GPUProvider):
         steps: int,
         cfg_scale: float,
         seed: Optional[int],
+        batch_size: int = 1,
     ) -> Dict[str, Any]:
         """Prepare workflow with parameters."""
         workflow = self._load_workflow()
         
         # Set seed
         if seed is None:
-            seed = random.randint(0, 2**32 - 1)
+            seed = randbits(32)
         
         # Update workflow parameters
         workflow["2"]["inputs"]["text"] = prompt
         workflow["3"]["inputs"]["text"] = negative_prompt
         workflow["4"]["inputs"]["width"] = width
         workflow["4"]["inputs"]["height"] = height
+        workflow["4"]["inputs"]["batch_size"] = batch_size
         workflow["5"]["inputs"]["seed"] = seed
         workflow["5"]["inputs"]["steps"] = steps
         workflow["5"]["inputs"]["cfg"] = cfg_scale
         
         return workflow
     
+    async def _execute_workflow(self, workflow: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Queue a workflow, wait for it to finish and get its output image infos.
+        
+        Returns:
+            Image info dicts (filename, subfolder, type) from every output node
+        """
+        client = self._get_client()
+        
+        # Queue prompt
+        response = await client.post(
+            "/prompt",
+            content=fastjson.dumps({
+                "prompt": workflow,
+                "client_id": self.client_id,
+            }),
+            headers={"Content-Type": "application/json"},
+        )
+        response.raise_for_status()
+        result = fastjson.loads(response.content)
+        prompt_id = result["prompt_id"]
+        
+        # Poll history until the prompt shows up there (it is added on completion)
+        deadline = time.monotonic() + self.timeout
+        delay = HISTORY_POLL_INITIAL
+        while True:
+            # Each poll may only use what is left of the deadline, so a server
+            # that accepts the connection but never answers cannot hang us
+            remaining = max(deadline - time.monotonic(), HISTORY_POLL_INITIAL)
+            response = await client.get(f"/history/{prompt_id}", timeout=remaining)
+            response.raise_for_status()
+            history = fastjson.loads(response.content)
+            if prompt_id in history:
+                break
+            if time.monotonic() + delay > deadline:
+                raise GenerationError(f"Timed out waiting for ComfyUI prompt {prompt_id}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 1.5, HISTORY_POLL_MAX)
+        
+        outputs = history[prompt_id]["outputs"]
+        return [
+            image_info
+            for node_output in outputs.values()
+            for image_info in node_output.get("images", ())
+        ]
+    
+    async def _download_images(self, image_infos: List[Dict[str, Any]]) -> List[bytes]:
+        """Download output images concurrently (at most MAX_CONCURRENT_DOWNLOADS at once)."""
+        client = self._get_client()
+        limit = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+        
+        async def download(image_info: Dict[str, Any]) -> bytes:
+            params = {
+                "filename": image_info["filename"],
+                "subfolder": image_info.get("subfolder", ""),
+                "type": image_info.get("type", "output"),
+            }
+            async with limit:
+                response = await client.get("/view", params=params)
+            response.raise_for_status()
+            return response.content
+        
+        return list(await asyncio.gather(*(download(info) for info in image_infos)))
+    
     async def generate(
         self,
         prompt: str,
@@ -152,65 +263,65 @@ class ComfyUIProvider(GPUProvider):
                 prompt, negative_prompt, width, height, steps, cfg_scale, seed
             )
             
-            # Queue prompt
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/prompt",
-                    json={
-                        "prompt": workflow,
-                        "client_id": self.client_id,
-                    },
-                )
-                response.raise_for_status()
-                result = response.json()
-                prompt_id = result["prompt_id"]
+            image_infos = await self._execute_workflow(workflow)
+            if not image_infos:
+                raise GenerationError("No output image found in ComfyUI response")
+            
+            images = await self._download_images(image_infos[:1])
+            return images[0]
             
-            # Wait for completion via WebSocket
-            ws_url = self.base_url.replace("http://", "ws://").replace("https://", "wss://")
-            async with websockets.connect(f"{ws_url}/ws?clientId={self.client_id}") as ws:
-                while True:
-                    message = await ws.recv()
-                    data = json.loads(message)
-                    
-                    if data.get("type") == "executing":
-                        executing_data = data.get("data", {})
-                        if executing_data.get("prompt_id") == prompt_id and executing_data.get("node") is None:
-                            # Execution finished
-                            break
+        except Exception as e:
+            raise GenerationError(f"ComfyUI generation failed: {e}")
+    
+    def max_batch_size(self, width: int, height: int) -> int:
+        """Latents per KSampler run: 4 at 768px and above, 8 below."""
+        return 4 if max(width, height) >= 768 else 8
+    
+    async def generate_batch(
+        self,
+        prompt: str,
+        count: int,
+        negative_prompt: str = "",
+        width: int = 1024,
+        height: int = 1024,
+        steps: int = 25,
+        cfg_scale: float = 7.0,
+        seed: Optional[int] = None,
+    ) -> List[bytes]:
+        """
+        Generate images as latent batches in as few workflows as possible.
+        
+        One KSampler run denoises the whole batch, so model load, CLIP encode
+        and VAE decode are paid once per batch instead of once per image. Batches
+        are capped by max_batch_size to stay within VRAM and run one after
+        another; the batch starting at image i is seeded seed + i, as the
+        GPUProvider.generate_batch contract requires.
+        """
+        try:
+            if seed is None:
+                seed = randbits(32)
             
-            # Get history to find output images
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(f"{self.base_url}/history/{prompt_id}")
-                response.raise_for_status()
-                history = response.json()
+            max_batch = self.max_batch_size(width, height)
             
-            # Extract output image
-            outputs = history[prompt_id]["outputs"]
-            for node_id, node_output in outputs.items():
-                if "images" in node_output:
-                    image_info = node_output["images"][0]
-                    filename = image_info["filename"]
-                    subfolder = image_info.get("subfolder", "")
-                    folder_type = image_info.get("type", "output")
-                    
-                    # Download image
-                    async with httpx.AsyncClient(timeout=self.timeout) as client:
-                        params = {
-                            "filename": filename,
-                            "subfolder": subfolder,
-                            "type": folder_type,
-                        }
-                        response = await client.get(
-                            f"{self.base_url}/view",
-                            params=params,
-                        )
-                        response.raise_for_status()
-                        return response.content
+            images: List[bytes] = []
+            for start in range(0, count, max_batch):
+                batch_size = min(max_batch, count - start)
+                workflow = self._prepare_workflow(
+                    prompt, negative_prompt, width, height, steps, cfg_scale,
+                    seed + start, batch_size=batch_size,
+                )
+                
+                image_infos = await self._execute_workflow(workflow)
+                if len(image_infos) < batch_size:
+                    raise GenerationError(
+                        f"Expected {batch_size} images, ComfyUI returned {len(image_infos)}"
+                    )
+                images.extend(await self._download_images(image_infos[:batch_size]))
             
-            raise GenerationError("No output image found in ComfyUI response")
+            return images
             
         except Exception as e:
-            raise GenerationError(f"ComfyUI generation failed: {e}")
+            raise GenerationError(f"ComfyUI batch generation failed: {e}")
     
     async def img2img(
         self,
@@ -238,15 +349,12 @@ class ComfyUIProvider(GPUProvider):
             temp_img_data.seek(0)
             
             # Upload image
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                files = {'image': ('input.png', temp_img_data, 'image/png')}
-                response = await client.post(
-                    f"{self.base_url}/upload/image",
-                    files=files,
-                )
-                response.raise_for_status()
-                upload_result = response.json()
-                uploaded_name = upload_result['name']
+            client = self._get_client()
+            files = {'image': ('input.png', temp_img_data, 'image/png')}
+            response = await client.post("/upload/image", files=files)
+            response.raise_for_status()
+            upload_result = fastjson.loads(response.content)
+            uploaded_name = upload_result['name']
             
             # Create img2img workflow
             workflow = self._create_img2img_workflow(
@@ -260,59 +368,12 @@ class ComfyUIProvider(GPUProvider):
             )
             
             # Queue and execute (same as generate)
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    f"{self.base_url}/prompt",
-                    json={
-                        "prompt": workflow,
-                        "client_id": self.client_id,
-                    },
-                )
-                response.raise_for_status()
-                result = response.json()
-                prompt_id = result["prompt_id"]
-            
-            # Wait for completion
-            ws_url = self.base_url.replace("http://", "ws://").replace("https://", "wss://")
-            async with websockets.connect(f"{ws_url}/ws?clientId={self.client_id}") as ws:
-                while True:
-                    message = await ws.recv()
-                    data = json.loads(message)
-                    
-                    if data.get("type") == "executing":
-                        executing_data = data.get("data", {})
-                        if executing_data.get("prompt_id") == prompt_id and executing_data.get("node") is None:
-                            break
-            
-            # Get result
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(f"{self.base_url}/history/{prompt_id}")
-                response.raise_for_status()
-                history = response.json()
-            
-            # Extract output
-            outputs = history[prompt_id]["outputs"]
-            for node_id, node_output in outputs.items():
-                if "images" in node_output:
-                    image_info = node_output["images"][0]
-                    filename = image_info["filename"]
-                    subfolder = image_info.get("subfolder", "")
-                    folder_type = image_info.get("type", "output")
-                    
-                    async with httpx.AsyncClient(timeout=self.timeout) as client:
-                        params = {
-                            "filename": filename,
-                            "subfolder": subfolder,
-                            "type": folder_type,
-                        }
-                        response = await client.get(
-                            f"{self.base_url}/view",
-                            params=params,
-                        )
-                        response.raise_for_status()
-                        return response.content
+            image_infos = await self._execute_workflow(workflow)
+            if not image_infos:
+                raise GenerationError("No output image found")
             
-            raise GenerationError("No output image found")
+            images = await self._download_images(image_infos[:1])
+            return images[0]
             
         except Exception as e:
             raise GenerationError(f"img2img failed: {e}")
@@ -329,7 +390,7 @@ class ComfyUIProvider(GPUProvider):
     ) -> Dict[str, Any]:
         """Create img2img workflow."""
         if seed is None:
-            seed = random.randint(0, 2**32 - 1)
+            seed = randbits(32)
         
         model_config = get_model_by_name(self.model_size)
         denoise = strength  # strength = denoise in ComfyUI
@@ -403,9 +464,8 @@ class ComfyUIProvider(GPUProvider):
     async def health_check(self) -> bool:
         """Check if ComfyUI is available."""
         try:
-            async with httpx.AsyncClient(timeout=5) as client:
-                response = await client.get(f"{self.base_url}/system_stats")
-                return response.status_code == 200
+            response = await self._get_client().get("/system_stats", timeout=5)
+            return response.status_code == 200
         except Exception:
             return False
 
@@ -1,13 +1,34 @@
 """Session management for authenticated users."""
 
 import json
+import os
+import struct
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, List, Optional, Tuple
 
+from imggen.domain.clock import UTC, from_unix_micros, to_unix_micros, utcnow_dt
+from imggen.domain.crypto import clear_key_caches
 from imggen.domain.value_objects import SessionInfo
 from imggen.domain.exceptions import SessionExpiredError, SessionNotFoundError
 
+# Session file layout: header (magic, version, user_id, created_at and
+# expires_at as Unix microseconds, master key length), then the master key
+# and the UTF-8 username. Legacy JSON session files are still accepted.
+SESSION_MAGIC = b"IMGS"
+SESSION_VERSION = 1
+_SESSION_HEADER = struct.Struct("<4sBqqqH")
+
+# Process-local caches of keys or plaintext derived from the session's master
+# key. They only outlive a session in long-lived processes, so they are
+# cleared whenever a session ends (logout or expiry) in this process.
+_SESSION_CACHES: List[Callable[[], None]] = [clear_key_caches]
+
+
+def register_session_cache(clear: Callable[[], None]) -> None:
+    """Register a cache-clearing function to run whenever a session ends."""
+    _SESSION_CACHES.append(clear)
+
 
 class SessionManager:
     """
@@ -22,19 +43,24 @@ class SessionManager:
         self.timeout = timeout
         self.session_dir.mkdir(parents=True, exist_ok=True)
         self.session_file = self.session_dir / ".session"
+        # Parsed session for the file as last seen, keyed by (mtime_ns, size), so
+        # chained use cases in one process don't re-read and re-parse it
+        self._cached: Optional[Tuple[Tuple[int, int], SessionInfo]] = None
     
     def create_session(self, session: SessionInfo) -> None:
         """Create a new session."""
-        data = {
-            "user_id": session.user_id,
-            "username": session.username,
-            "master_key": session.master_key.hex(),
-            "created_at": session.created_at.isoformat(),
-            "expires_at": session.expires_at.isoformat(),
-        }
+        header = _SESSION_HEADER.pack(
+            SESSION_MAGIC,
+            SESSION_VERSION,
+            session.user_id,
+            to_unix_micros(session.created_at),
+            to_unix_micros(session.expires_at),
+            len(session.master_key),
+        )
         
-        with open(self.session_file, "w") as f:
-            json.dump(data, f)
+        self._cached = None
+        with open(self.session_file, "wb") as f:
+            f.write(header + session.master_key + session.username.encode("utf-8"))
         
         # Set restrictive permissions (Unix only)
         try:
@@ -44,39 +70,79 @@ class SessionManager:
     
     def get_session(self) -> Optional[SessionInfo]:
         """Get current session if valid."""
-        if not self.session_file.exists():
+        try:
+            st = self.session_file.stat()
+        except FileNotFoundError:
+            self._cached = None
             return None
         
         try:
-            with open(self.session_file, "r") as f:
-                data = json.load(f)
-            
-            expires_at = datetime.fromisoformat(data["expires_at"])
+            stamp = (st.st_mtime_ns, st.st_size)
+            if self._cached is not None and self._cached[0] == stamp:
+                session = self._cached[1]
+            else:
+                raw = self.session_file.read_bytes()
+                if raw[:4] == SESSION_MAGIC:
+                    session = self._parse_session(raw)
+                else:
+                    session = self._parse_legacy_session(json.loads(raw))
+                self._cached = (stamp, session)
             
             # Check if expired
-            if datetime.utcnow() > expires_at:
+            if utcnow_dt() > session.expires_at:
                 self.clear_session()
                 raise SessionExpiredError("Session has expired. Please login again.")
             
-            return SessionInfo(
-                user_id=data["user_id"],
-                username=data["username"],
-                master_key=bytes.fromhex(data["master_key"]),
-                created_at=datetime.fromisoformat(data["created_at"]),
-                expires_at=expires_at,
-            )
+            return session
             
-        except (json.JSONDecodeError, KeyError, ValueError) as e:
+        except (json.JSONDecodeError, KeyError, ValueError, struct.error) as e:
             # Invalid session file
             self.clear_session()
             return None
     
+    @staticmethod
+    def _parse_session(raw: bytes) -> SessionInfo:
+        """Parse a binary session file."""
+        _, version, user_id, created_at, expires_at, key_len = _SESSION_HEADER.unpack_from(raw)
+        if version != SESSION_VERSION:
+            raise ValueError(f"Unsupported session file version: {version}")
+        
+        offset = _SESSION_HEADER.size
+        return SessionInfo(
+            user_id=user_id,
+            username=raw[offset + key_len:].decode("utf-8"),
+            master_key=raw[offset:offset + key_len],
+            created_at=from_unix_micros(created_at),
+            expires_at=from_unix_micros(expires_at),
+        )
+    
+    @staticmethod
+    def _parse_legacy_session(data: dict) -> SessionInfo:
+        """Parse a session file written in the legacy JSON format."""
+        expires_at = datetime.fromisoformat(data["expires_at"])
+        if expires_at.tzinfo is None:
+            # Sessions written before timestamps were timezone-aware
+            expires_at = expires_at.replace(tzinfo=UTC)
+        
+        return SessionInfo(
+            user_id=data["user_id"],
+            username=data["username"],
+            master_key=bytes.fromhex(data["master_key"]),
+            created_at=datetime.fromisoformat(data["created_at"]),
+            expires_at=expires_at,
+        )
+    
     def clear_session(self) -> None:
-        """Clear current session."""
+        """Clear current session and the caches derived from it."""
+        self._cached = None
+        for clear in _SESSION_CACHES:
+            clear()
         if self.session_file.exists():
-            # Overwrite with zeros before deletion
-            with open(self.session_file, "wb") as f:
-                f.write(b"\x00" * 1024)
+            # Overwrite with zeros in place and flush to disk before deletion
+            with open(self.session_file, "r+b") as f:
+                f.write(bytes(self.session_file.stat().st_size))
+                f.flush()
+                os.fsync(f.fileno())
             
             self.session_file.unlink()
     
@@ -1,8 +1,10 @@
 """Abstract vault storage interface."""
 
+import io
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Callable, Iterator, Optional
 
 from imggen.domain.value_objects import EncryptedBlob
 
@@ -25,6 +27,36 @@ class VaultStorage(ABC):
         """
         pass
     
+    def store_stream(
+        self,
+        user_id: int,
+        filename: str,
+        algorithm: str,
+        salt: bytes,
+        write: Callable[[BinaryIO], object],
+    ) -> str:
+        """
+        Store encrypted data produced by a writer callback.
+        
+        Lets callers encrypt straight into the vault file in chunks instead of
+        building the whole ciphertext first. The default implementation
+        buffers the output and delegates to store().
+        
+        Args:
+            user_id: User ID
+            filename: Desired filename
+            algorithm: Encryption algorithm of the data
+            salt: Key derivation salt of the data
+            write: Called with a binary file to write the ciphertext to
+        
+        Returns:
+            Vault path (relative)
+        """
+        out = io.BytesIO()
+        write(out)
+        blob = EncryptedBlob(data=out.getvalue(), salt=salt, algorithm=algorithm)
+        return self.store(user_id, blob, filename)
+    
     @abstractmethod
     def retrieve(self, vault_path: str) -> Optional[EncryptedBlob]:
         """
@@ -38,6 +70,22 @@ class VaultStorage(ABC):
         """
         pass
     
+    @contextmanager
+    def open_blob(self, vault_path: str) -> Iterator[Optional[EncryptedBlob]]:
+        """
+        Open encrypted blob for the duration of a with block.
+        
+        The default yields retrieve(); backends may hand out data that is
+        only valid inside the block (e.g. a memory-mapped view).
+        
+        Args:
+            vault_path: Vault path (relative)
+        
+        Yields:
+            EncryptedBlob or None if not found
+        """
+        yield self.retrieve(vault_path)
+    
     @abstractmethod
     def delete(self, vault_path: str) -> bool:
         """
@@ -1,15 +1,43 @@
 """Local filesystem vault storage."""
 
+import mmap
 import os
 import json
+import struct
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
-from typing import Optional
-from datetime import datetime
+from typing import BinaryIO, Callable, Iterator, Optional, Tuple
 
+from imggen.domain.clock import utcnow_dt
 from imggen.domain.value_objects import EncryptedBlob
 from imggen.domain.exceptions import VaultAccessError
 from .base import VaultStorage
 
+# Vault file layout: header (magic, version, algorithm length, salt length),
+# then algorithm (UTF-8), salt and ciphertext as raw bytes. Files without the
+# magic are the legacy hex-in-JSON format and are still readable.
+VAULT_MAGIC = b"IMGV"
+VAULT_VERSION = 1
+_VAULT_HEADER = struct.Struct("<4sBHH")
+
+# Files at least this large are memory-mapped by open_blob instead of read
+MMAP_MIN_SIZE = 1 << 20
+
+# Chunk of random bytes written repeatedly when securely deleting a file
+OVERWRITE_CHUNK_SIZE = 1 << 20
+
+
+def _unmap(mapped: mmap.mmap, *views: memoryview) -> None:
+    """Release views of a mapping, then close it."""
+    try:
+        for view in reversed(views):
+            view.release()
+        mapped.close()
+    except BufferError:
+        # A caller kept a slice of the mapping past the with block; it is
+        # unmapped once that slice is garbage collected
+        pass
+
 
 class LocalVaultStorage(VaultStorage):
     """Local filesystem implementation of vault storage."""
@@ -17,6 +45,8 @@ class LocalVaultStorage(VaultStorage):
     def __init__(self, vault_dir: Path):
         self.vault_dir = vault_dir
         self.vault_dir.mkdir(parents=True, exist_ok=True)
+        # Resolved once; every path lookup is checked against this prefix
+        self._vault_root = os.path.join(os.path.realpath(self.vault_dir), "")
     
     def _get_user_dir(self, user_id: int) -> Path:
         """Get user-specific vault directory."""
@@ -29,40 +59,69 @@ class LocalVaultStorage(VaultStorage):
         full_path = self.vault_dir / vault_path
         
         # Security: ensure path is within vault directory
-        try:
-            full_path.resolve().relative_to(self.vault_dir.resolve())
-        except ValueError:
+        if not os.path.join(os.path.realpath(full_path), "").startswith(self._vault_root):
             raise VaultAccessError("Invalid vault path (directory traversal attempt)")
         
         return full_path
     
+    def _unique_path(self, user_id: int, filename: str) -> Path:
+        """Get a timestamped file path for filename in the user's vault directory."""
+        user_dir = self._get_user_dir(user_id)
+        
+        timestamp = utcnow_dt().strftime("%Y%m%d_%H%M%S")
+        name_parts = filename.rsplit(".", 1)
+        if len(name_parts) == 2:
+            unique_filename = f"{name_parts[0]}_{timestamp}.{name_parts[1]}"
+        else:
+            unique_filename = f"{filename}_{timestamp}"
+        
+        return user_dir / unique_filename
+    
+    @staticmethod
+    def _write_header(f: BinaryIO, algorithm: str, salt: bytes) -> None:
+        """Write the vault header, algorithm and salt."""
+        # Raw bytes behind a small header (no hex/JSON encoding)
+        encoded = algorithm.encode("utf-8")
+        f.write(_VAULT_HEADER.pack(VAULT_MAGIC, VAULT_VERSION, len(encoded), len(salt)))
+        f.write(encoded)
+        f.write(salt)
+    
     def store(self, user_id: int, blob: EncryptedBlob, filename: str) -> str:
         """Store encrypted blob."""
         try:
-            user_dir = self._get_user_dir(user_id)
+            file_path = self._unique_path(user_id, filename)
             
-            # Generate unique filename with timestamp
-            timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-            name_parts = filename.rsplit(".", 1)
-            if len(name_parts) == 2:
-                unique_filename = f"{name_parts[0]}_{timestamp}.{name_parts[1]}"
-            else:
-                unique_filename = f"{filename}_{timestamp}"
+            with open(file_path, "wb") as f:
+                self._write_header(f, blob.algorithm, blob.salt)
+                f.write(blob.data)
             
-            file_path = user_dir / unique_filename
+            # Return relative path
+            return str(file_path.relative_to(self.vault_dir))
             
-            # Store as JSON with encrypted data and metadata
-            data = {
-                "data": blob.data.hex(),  # Store as hex string
-                "salt": blob.salt.hex(),
-                "algorithm": blob.algorithm,
-                "stored_at": datetime.utcnow().isoformat(),
-            }
+        except Exception as e:
+            raise VaultAccessError(f"Failed to store file: {e}")
+    
+    def store_stream(
+        self,
+        user_id: int,
+        filename: str,
+        algorithm: str,
+        salt: bytes,
+        write: Callable[[BinaryIO], object],
+    ) -> str:
+        """Store encrypted data written by write() straight into the vault file."""
+        try:
+            file_path = self._unique_path(user_id, filename)
             
-            with open(file_path, "w") as f:
-                json.dump(data, f)
+            try:
+                with open(file_path, "wb") as f:
+                    self._write_header(f, algorithm, salt)
+                    write(f)
+            except BaseException:
+                # Don't leave a truncated vault file behind
+                file_path.unlink(missing_ok=True)
+                raise
             
-            # Return relative path
             return str(file_path.relative_to(self.vault_dir))
             
         except Exception as e:
@@ -76,18 +135,80 @@ class LocalVaultStorage(VaultStorage):
             if not file_path.exists():
                 return None
             
-            with open(file_path, "r") as f:
-                data = json.load(f)
-            
-            return EncryptedBlob(
-                data=bytes.fromhex(data["data"]),
-                salt=bytes.fromhex(data["salt"]),
-                algorithm=data["algorithm"],
-            )
+            with open(file_path, "rb") as f:
+                header = self._read_header(f)
+                if header is None:
+                    return self._read_legacy(f)
+                
+                # Read the ciphertext straight into its own bytes object
+                algorithm, salt = header
+                return EncryptedBlob(data=f.read(), salt=salt, algorithm=algorithm)
             
         except Exception as e:
             raise VaultAccessError(f"Failed to retrieve file: {e}")
     
+    @contextmanager
+    def open_blob(self, vault_path: str) -> Iterator[Optional[EncryptedBlob]]:
+        """
+        Open encrypted blob for the duration of a with block.
+        
+        For files of MMAP_MIN_SIZE or more, data is a read-only memoryview of a
+        memory-mapped file: nothing is copied, pages are read in as the
+        ciphertext is decrypted, and the mapping is closed on exit.
+        """
+        with ExitStack() as stack:
+            try:
+                blob = self._open_blob(vault_path, stack)
+            except Exception as e:
+                raise VaultAccessError(f"Failed to retrieve file: {e}")
+            yield blob
+    
+    def _open_blob(self, vault_path: str, stack: ExitStack) -> Optional[EncryptedBlob]:
+        """Open a vault file, registering the file and any mapping with stack."""
+        file_path = self._resolve_path(vault_path)
+        if not file_path.exists():
+            return None
+        
+        f = stack.enter_context(open(file_path, "rb"))
+        header = self._read_header(f)
+        if header is None:
+            return self._read_legacy(f)
+        
+        algorithm, salt = header
+        if os.fstat(f.fileno()).st_size < MMAP_MIN_SIZE:
+            return EncryptedBlob(data=f.read(), salt=salt, algorithm=algorithm)
+        
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        data = view[f.tell():]
+        stack.callback(_unmap, mapped, view, data)
+        return EncryptedBlob(data=data, salt=salt, algorithm=algorithm)
+    
+    @staticmethod
+    def _read_header(f: BinaryIO) -> Optional[Tuple[str, bytes]]:
+        """Read the vault header, returning (algorithm, salt), or None for legacy files."""
+        header = f.read(_VAULT_HEADER.size)
+        if header[:4] != VAULT_MAGIC:
+            f.seek(0)
+            return None
+        
+        _, version, algorithm_len, salt_len = _VAULT_HEADER.unpack(header)
+        if version != VAULT_VERSION:
+            raise VaultAccessError(f"Unsupported vault file version: {version}")
+        
+        algorithm = f.read(algorithm_len).decode("utf-8")
+        return algorithm, f.read(salt_len)
+    
+    @staticmethod
+    def _read_legacy(f) -> EncryptedBlob:
+        """Read a vault file written in the legacy hex-in-JSON format."""
+        data = json.load(f)
+        return EncryptedBlob(
+            data=bytes.fromhex(data["data"]),
+            salt=bytes.fromhex(data["salt"]),
+            algorithm=data["algorithm"],
+        )
+    
     def delete(self, vault_path: str) -> bool:
         """Securely delete encrypted file."""
         try:
@@ -96,10 +217,17 @@ class LocalVaultStorage(VaultStorage):
             if not file_path.exists():
                 return False
             
-            # Overwrite with random data before deletion (simple secure delete)
+            # Overwrite with random data before deletion (simple secure delete).
+            # r+b rewrites the existing blocks in place ("wb" would truncate
+            # first), one reused chunk at a time to bound memory
             file_size = file_path.stat().st_size
-            with open(file_path, "wb") as f:
-                f.write(os.urandom(file_size))
+            noise = os.urandom(min(file_size, OVERWRITE_CHUNK_SIZE))
+            with open(file_path, "r+b") as f:
+                remaining = file_size
+                while remaining:
+                    remaining -= f.write(noise[:remaining])
+                f.flush()
+                os.fsync(f.fileno())
             
             # Delete file
             file_path.unlink()
@@ -1,29 +1,56 @@
 """Main CLI application."""
 
+import importlib
+import sys
+from typing import List, Optional
+
 import typer
-from rich.console import Console
+import typer.main
+from typer.core import TyperGroup
+
+# Subcommand groups: name -> (module, Typer attribute, help). Each module pulls
+# in its own heavy dependencies (crypto, HTTP client, database), so a group's
+# module is only imported once the group is looked up.
+SUBCOMMANDS = {
+    "user": ("imggen.interfaces.cli.user", "user_app", "User management"),
+    "generate": ("imggen.interfaces.cli.generate", "generate_app", "Generate images"),
+    "gallery": ("imggen.interfaces.cli.gallery", "gallery_app", "Manage image gallery"),
+    "img2img": ("imggen.interfaces.cli.img2img", "img2img_app", "Image-to-image transformation"),
+    "config": ("imggen.interfaces.cli.config", "config_app", "Configuration"),
+}
+
+
+class LazyGroup(TyperGroup):
+    """Command group that imports a SUBCOMMANDS module when its group is looked up."""
+    
+    def list_commands(self, ctx: typer.Context) -> List[str]:
+        return super().list_commands(ctx) + [
+            name for name in SUBCOMMANDS if name not in self.commands
+        ]
+    
+    def get_command(self, ctx: typer.Context, cmd_name: str) -> Optional[TyperGroup]:
+        if cmd_name not in self.commands and cmd_name in SUBCOMMANDS:
+            self.add_command(_load_subcommand(cmd_name), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+
+def _load_subcommand(name: str) -> TyperGroup:
+    """Import a subcommand group's module and build its command."""
+    module, attr, help_text = SUBCOMMANDS[name]
+    sub_app = getattr(importlib.import_module(module), attr)
+    # Let Typer build the group exactly as add_typer on the main app would
+    holder = typer.Typer()
+    holder.add_typer(sub_app, name=name, help=help_text)
+    return typer.main.get_group(holder).commands[name]
 
-from .user import user_app
-from .generate import generate_app
-from .gallery import gallery_app
-from .config import config_app
-from .img2img import img2img_app
 
 app = typer.Typer(
     name="imggen",
     help="Secure AI Image Generation with E2E Encryption",
     no_args_is_help=True,
+    cls=LazyGroup,
 )
 
-console = Console()
-
-# Add subcommands
-app.add_typer(user_app, name="user", help="User management")
-app.add_typer(generate_app, name="generate", help="Generate images")
-app.add_typer(gallery_app, name="gallery", help="Manage image gallery")
-app.add_typer(img2img_app, name="img2img", help="Image-to-image transformation")
-app.add_typer(config_app, name="config", help="Configuration")
-
 
 @app.callback()
 def callback():
@@ -31,11 +58,24 @@ def callback():
     pass
 
 
+def _use_uvloop() -> None:
+    """Run asyncio.run() on uvloop when the optional "fast" extra is installed."""
+    if sys.platform == "win32":
+        return
+    try:
+        import uvloop
+    except ImportError:
+        return
+    
+    import asyncio
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
 def main():
     """Entry point for CLI."""
+    _use_uvloop()
     app()
 
 
 if __name__ == "__main__":
     main()
-
@@ -1,15 +1,44 @@
 """Configuration commands."""
 
+from functools import lru_cache
+from typing import Tuple
 import typer
 from rich.console import Console
 from rich.table import Table
 
-from imggen.config import settings
+from imggen.config import get_settings
 
 config_app = typer.Typer()
 console = Console()
 
 
+@lru_cache(maxsize=1)
+def _config_rows() -> Tuple[Tuple[str, str], ...]:
+    """Get the (setting, value) rows for config show (settings are fixed per process)."""
+    settings = get_settings()
+    return (
+        ("Data Directory", str(settings.data_dir)),
+        ("Database Path", str(settings.db_path)),
+        ("Vault Directory", str(settings.vault_dir)),
+        ("Session Directory", str(settings.session_dir)),
+        ("Workflow Directory", str(settings.workflow_dir)),
+        ("", ""),
+        ("ComfyUI URL", settings.comfyui_url),
+        ("ComfyUI Timeout", f"{settings.comfyui_timeout}s"),
+        ("Health Check Cache", f"{settings.health_cache_ttl}s"),
+        ("", ""),
+        ("Session Timeout", f"{settings.session_timeout}s"),
+        ("Password KDF", settings.kdf_algorithm),
+        ("KDF Hash", settings.kdf_hash),
+        ("PBKDF2 Iterations", str(settings.pbkdf2_iterations)),
+        ("", ""),
+        ("Default Width", str(settings.default_width)),
+        ("Default Height", str(settings.default_height)),
+        ("Default Steps", str(settings.default_steps)),
+        ("Default CFG", str(settings.default_cfg)),
+    )
+
+
 @config_app.command("show")
 def show_config():
     """Show current configuration."""
@@ -17,21 +46,8 @@ def show_config():
     table.add_column("Setting", style="cyan", no_wrap=True)
     table.add_column("Value", style="white")
     
-    table.add_row("Data Directory", str(settings.data_dir))
-    table.add_row("Database Path", str(settings.db_path))
-    table.add_row("Vault Directory", str(settings.vault_dir))
-    table.add_row("Session Directory", str(settings.session_dir))
-    table.add_row("Workflow Directory", str(settings.workflow_dir))
-    table.add_row("", "")
-    table.add_row("ComfyUI URL", settings.comfyui_url)
-    table.add_row("ComfyUI Timeout", f"{settings.comfyui_timeout}s")
-    table.add_row("", "")
-    table.add_row("Session Timeout", f"{settings.session_timeout}s")
-    table.add_row("", "")
-    table.add_row("Default Width", str(settings.default_width))
-    table.add_row("Default Height", str(settings.default_height))
-    table.add_row("Default Steps", str(settings.default_steps))
-    table.add_row("Default CFG", str(settings.default_cfg))
+    for setting, value in _config_rows():
+        table.add_row(setting, value)
     
     console.print()
     console.print(table)
@@ -1,14 +1,21 @@
 """Gallery management commands."""
 
+import sys
 from pathlib import Path
+from functools import lru_cache
+from itertools import islice
+from typing import List, Optional
 import typer
 from rich.console import Console
+from rich.live import Live
 from rich.table import Table
 from rich.panel import Panel
 
-from imggen.config import settings
+from imggen.config import get_settings
+from imggen.domain import fastjson
 from imggen.domain.crypto import CryptoService
 from imggen.domain.exceptions import SessionNotFoundError, ImageNotFoundError
+from imggen.domain.value_objects import ImageMetadata
 from imggen.infrastructure.database.sqlite import SQLiteImageRepository
 from imggen.infrastructure.storage.local import LocalVaultStorage
 from imggen.infrastructure.session import SessionManager
@@ -23,9 +30,14 @@ from imggen.application.gallery import (
 gallery_app = typer.Typer()
 console = Console()
 
+# Images read and decrypted per batch while streaming the gallery list
+LIST_PAGE_SIZE = 32
 
+
+@lru_cache(maxsize=1)
 def get_dependencies():
-    """Get shared dependencies."""
+    """Get shared dependencies (memoized; reset with get_dependencies.cache_clear())."""
+    settings = get_settings()
     settings.ensure_dirs()
     image_repo = SQLiteImageRepository(settings.db_path)
     vault_storage = LocalVaultStorage(settings.vault_dir)
@@ -33,6 +45,9 @@ def get_dependencies():
         time_cost=settings.argon2_time_cost,
         memory_cost=settings.argon2_memory_cost,
         parallelism=settings.argon2_parallelism,
+        kdf_algorithm=settings.kdf_algorithm,
+        kdf_hash=settings.kdf_hash,
+        pbkdf2_iterations=settings.pbkdf2_iterations,
     )
     session_manager = SessionManager(
         settings.session_dir,
@@ -41,51 +56,101 @@ def get_dependencies():
     return image_repo, vault_storage, crypto_service, session_manager
 
 
+def _add_image_row(table: Table, image_id: int, metadata: Optional[ImageMetadata]) -> None:
+    """Add a gallery list row (metadata is None if it failed to decrypt)."""
+    if metadata is None:
+        table.add_row(str(image_id), "[red]Decryption error[/red]", "-", "-")
+        return
+    
+    prompt_preview = metadata.prompt[:50] + "..." if len(metadata.prompt) > 50 else metadata.prompt
+    size_str = f"{metadata.width}x{metadata.height}"
+    created_str = metadata.created_at.strftime("%Y-%m-%d %H:%M")
+    
+    table.add_row(
+        str(image_id),
+        prompt_preview,
+        size_str,
+        created_str,
+    )
+
+
+def _write_json_line(image_id: int, metadata: Optional[ImageMetadata]) -> None:
+    """Write an image as one JSON line (for piped output instead of Rich tables)."""
+    if metadata is None:
+        record = {"id": image_id, "error": "decryption failed"}
+    else:
+        record = {"id": image_id, **metadata.model_dump(mode="json")}
+    sys.stdout.write(fastjson.dumps(record).decode("utf-8") + "\n")
+
+
 @gallery_app.command("list")
 def list_images(
     limit: int = typer.Option(100, "--limit", "-l", help="Maximum number of images"),
-    offset: int = typer.Option(0, "--offset", "-o", help="Offset for pagination"),
+    offset: int = typer.Option(
+        0, "--offset", "-o", help="Offset for pagination (deprecated: use --after-id)"
+    ),
+    after_id: Optional[int] = typer.Option(
+        None, "--after-id", help="Show images after this image ID (next page)"
+    ),
+    ids_only: bool = typer.Option(
+        False, "--ids-only", help="Print only image IDs, one per line (no decryption)"
+    ),
 ):
     """List all images in gallery."""
     try:
         image_repo, _, crypto_service, session_manager = get_dependencies()
         use_case = ListImagesUseCase(image_repo, session_manager)
         
-        images = use_case.execute(limit=limit, offset=offset)
+        images = use_case.iter(limit=limit, offset=offset, after_id=after_id)
         
-        if not images:
-            console.print("\n[yellow]No images found[/yellow]\n")
-            console.print("[dim]Generate your first image with:[/dim] imggen generate \"your prompt\"\n")
+        if ids_only:
+            # IDs are stored in the clear, so scripts get them without any crypto
+            for image in images:
+                typer.echo(image.id)
             return
         
         # Get metadata use case for decryption
         metadata_use_case = GetImageMetadataUseCase(image_repo, crypto_service, session_manager)
         
-        table = Table(title=f"Image Gallery ({len(images)} images)", show_header=True)
+        if not console.is_terminal:
+            # Piped: stream JSON lines a page at a time instead of rendering a table
+            while page := list(islice(images, LIST_PAGE_SIZE)):
+                metadata_by_id = metadata_use_case.execute_batch(
+                    [image.id for image in page]  # type: ignore
+                )
+                for image in page:
+                    _write_json_line(image.id, metadata_by_id.get(image.id))  # type: ignore
+            return
+        
+        first_page = list(islice(images, LIST_PAGE_SIZE))
+        if not first_page:
+            console.print("\n[yellow]No images found[/yellow]\n")
+            console.print("[dim]Generate your first image with:[/dim] imggen generate \"your prompt\"\n")
+            return
+        
+        table = Table(title="Image Gallery", show_header=True)
         table.add_column("ID", style="cyan", no_wrap=True)
         table.add_column("Prompt", style="white")
         table.add_column("Size", style="green", no_wrap=True)
         table.add_column("Created", style="dim", no_wrap=True)
         
-        for image in images:
-            try:
-                metadata = metadata_use_case.execute(image.id)  # type: ignore
-                prompt_preview = metadata.prompt[:50] + "..." if len(metadata.prompt) > 50 else metadata.prompt
-                size_str = f"{metadata.width}x{metadata.height}"
-                created_str = metadata.created_at.strftime("%Y-%m-%d %H:%M")
-                
-                table.add_row(
-                    str(image.id),
-                    prompt_preview,
-                    size_str,
-                    created_str,
+        # Rows are read and decrypted a page at a time and shown as they arrive
+        console.print()
+        with Live(table, console=console, refresh_per_second=4):
+            page = first_page
+            while page:
+                metadata_by_id = metadata_use_case.execute_batch(
+                    [image.id for image in page]  # type: ignore
                 )
-            except Exception:
-                # Skip images with decryption errors
-                table.add_row(str(image.id), "[red]Decryption error[/red]", "-", "-")
+                for image in page:
+                    _add_image_row(table, image.id, metadata_by_id.get(image.id))  # type: ignore
+                last_id = page[-1].id
+                page = list(islice(images, LIST_PAGE_SIZE))
+            
+            table.title = f"Image Gallery ({table.row_count} images)"
         
-        console.print()
-        console.print(table)
+        if table.row_count == limit:
+            console.print(f"\n[dim]Next page:[/dim] imggen gallery list --after-id {last_id}")
         console.print()
         
     except SessionNotFoundError as e:
@@ -106,6 +171,10 @@ def show_info(image_id: int = typer.Argument(..., help="Image ID")):
         
         metadata = use_case.execute(image_id)
         
+        if not console.is_terminal:
+            _write_json_line(image_id, metadata)
+            return
+        
         # Create info panel
         info_text = f"""[bold]Prompt:[/bold] {metadata.prompt}
 
@@ -173,6 +242,40 @@ def export_image(
         raise typer.Exit(1)
 
 
+@gallery_app.command("export-many")
+def export_many(
+    image_ids: List[int] = typer.Argument(..., help="Image IDs"),
+    output_dir: str = typer.Option(".", "--dir", "-d", help="Output directory"),
+):
+    """Decrypt and export several images to a directory in parallel."""
+    try:
+        image_repo, vault_storage, crypto_service, session_manager = get_dependencies()
+        use_case = ExportImageUseCase(image_repo, vault_storage, crypto_service, session_manager)
+        
+        with console.status(f"[bold green]Exporting {len(image_ids)} images..."):
+            paths, errors = use_case.execute_many(image_ids, Path(output_dir))
+        
+        for image_id in image_ids:
+            if image_id in paths:
+                console.print(f"[bold green]✓[/bold green] {image_id} → {paths[image_id]}")
+            elif image_id in errors:
+                console.print(f"[bold red]✗[/bold red] {image_id}: {errors[image_id]}")
+            else:
+                console.print(f"[yellow]Image {image_id} not found[/yellow]")
+        console.print()
+        
+    except SessionNotFoundError as e:
+        console.print(f"\n[bold red]Error:[/bold red] {e}", style="red")
+        console.print("[dim]Please login first: imggen user login[/dim]\n")
+        raise typer.Exit(1)
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] {e}", style="red")
+        raise typer.Exit(1)
+    
+    if errors:
+        raise typer.Exit(1)
+
+
 @gallery_app.command("delete")
 def delete_image(
     image_id: int = typer.Argument(..., help="Image ID"),
@@ -208,19 +311,30 @@ def delete_image(
 
 @gallery_app.command("search")
 def search_images(
-    keyword: str = typer.Argument(..., help="Search keyword"),
+    keywords: List[str] = typer.Argument(..., help="Search keywords"),
     limit: int = typer.Option(100, "--limit", "-l", help="Maximum results"),
+    match_any: bool = typer.Option(False, "--any", help="Match any keyword instead of all"),
 ):
-    """Search images by prompt keyword."""
+    """Search images by prompt keywords."""
     try:
         image_repo, _, crypto_service, session_manager = get_dependencies()
         use_case = SearchImagesUseCase(image_repo, crypto_service, session_manager)
         
-        with console.status(f"[bold green]Searching for '{keyword}'..."):
-            results = use_case.execute(keyword, limit=limit)
+        query = " ".join(keywords)
+        with console.status(f"[bold green]Searching for '{query}'..."):
+            results, unreadable = use_case.execute(keywords, limit=limit, match_all=not match_any)
+        
+        if unreadable:
+            # stderr, so piped JSON lines stay clean
+            typer.echo(f"Warning: {unreadable} images could not be decrypted and were skipped", err=True)
+        
+        if not console.is_terminal:
+            for image, metadata in results:
+                _write_json_line(image.id, metadata)  # type: ignore
+            return
         
         if not results:
-            console.print(f"\n[yellow]No images found matching '{keyword}'[/yellow]\n")
+            console.print(f"\n[yellow]No images found matching '{query}'[/yellow]\n")
             return
         
         table = Table(title=f"Search Results ({len(results)} images)", show_header=True)
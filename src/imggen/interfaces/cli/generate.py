@@ -1,20 +1,13 @@
 """Image generation commands."""
 
-import asyncio
+from functools import lru_cache
 from typing import Optional
 import typer
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
 
-from imggen.config import settings
-from imggen.domain.crypto import CryptoService
 from imggen.domain.exceptions import SessionNotFoundError, GenerationError
 from imggen.domain.models import MODELS, ModelSize, get_model_by_name
-from imggen.infrastructure.database.sqlite import SQLiteImageRepository
-from imggen.infrastructure.gpu.comfyui import ComfyUIProvider
-from imggen.infrastructure.storage.local import LocalVaultStorage
-from imggen.infrastructure.session import SessionManager
-from imggen.application.generation import GenerateImageUseCase
+from imggen.interfaces.cli.helpers import run_and_close
 
 generate_app = typer.Typer()
 console = Console()
@@ -50,21 +43,37 @@ def list_models():
     console.print()
 
 
+@lru_cache(maxsize=4)
 def get_dependencies(model_size: str = "large"):
-    """Get shared dependencies."""
+    """Get shared dependencies (memoized; reset with get_dependencies.cache_clear())."""
+    from imggen.config import get_settings
+    from imggen.domain.crypto import CryptoService
+    from imggen.infrastructure.database.sqlite import SQLiteImageRepository
+    from imggen.infrastructure.gpu.caching import HealthCachingProvider
+    from imggen.infrastructure.gpu.comfyui import ComfyUIProvider
+    from imggen.infrastructure.storage.local import LocalVaultStorage
+    from imggen.infrastructure.session import SessionManager
+    
+    settings = get_settings()
     settings.ensure_dirs()
     image_repo = SQLiteImageRepository(settings.db_path)
-    gpu_provider = ComfyUIProvider(
-        base_url=settings.comfyui_url,
-        timeout=settings.comfyui_timeout,
-        workflow_path=None,
-        model_size=model_size,
+    gpu_provider = HealthCachingProvider(
+        ComfyUIProvider(
+            base_url=settings.comfyui_url,
+            timeout=settings.comfyui_timeout,
+            workflow_path=None,
+            model_size=model_size,
+        ),
+        cache_ttl=settings.health_cache_ttl,
     )
     vault_storage = LocalVaultStorage(settings.vault_dir)
     crypto_service = CryptoService(
         time_cost=settings.argon2_time_cost,
         memory_cost=settings.argon2_memory_cost,
         parallelism=settings.argon2_parallelism,
+        kdf_algorithm=settings.kdf_algorithm,
+        kdf_hash=settings.kdf_hash,
+        pbkdf2_iterations=settings.pbkdf2_iterations,
     )
     session_manager = SessionManager(
         settings.session_dir,
@@ -86,6 +95,12 @@ def generate(
     model: str = typer.Option("large", "-m", "--model", help="Model size (small/medium/large)"),
 ):
     """Generate an AI image with E2E encryption."""
+    import asyncio
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from imggen.config import get_settings
+    from imggen.application.generation import GenerateImageUseCase
+    
+    settings = get_settings()
     
     # Validate and get model config
     try:
@@ -148,7 +163,7 @@ def generate(
             progress.add_task(description="Generating image...", total=None)
             
             image = asyncio.run(
-                use_case.execute(
+                run_and_close(gpu_provider, use_case.execute(
                     prompt=prompt,
                     negative_prompt=negative_prompt,
                     width=width,
@@ -156,7 +171,7 @@ def generate(
                     steps=steps,
                     cfg_scale=cfg_scale,
                     seed=seed,
-                )
+                ))
             )
         
         console.print(f"\n[bold green]✓[/bold green] Image generated successfully!")
@@ -0,0 +1,15 @@
+"""Helpers shared by CLI commands."""
+
+from typing import Awaitable, TypeVar
+
+from imggen.infrastructure.gpu.base import GPUProvider
+
+T = TypeVar("T")
+
+
+async def run_and_close(gpu_provider: GPUProvider, coro: Awaitable[T]) -> T:
+    """Await a use case, then close the provider's HTTP connections."""
+    try:
+        return await coro
+    finally:
+        await gpu_provider.aclose()
@@ -1,40 +1,49 @@
 """Image-to-image transformation commands."""
 
-import asyncio
 from pathlib import Path
+from functools import lru_cache
 from typing import Optional
 import typer
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
 
-from imggen.config import settings
-from imggen.domain.crypto import CryptoService
 from imggen.domain.exceptions import SessionNotFoundError, GenerationError, ImageNotFoundError
-from imggen.infrastructure.database.sqlite import SQLiteImageRepository
-from imggen.infrastructure.gpu.comfyui import ComfyUIProvider
-from imggen.infrastructure.storage.local import LocalVaultStorage
-from imggen.infrastructure.session import SessionManager
-from imggen.application.img2img import Img2ImgUseCase, RestyleImageUseCase
+from imggen.interfaces.cli.helpers import run_and_close
 
 img2img_app = typer.Typer()
 console = Console()
 
 
+@lru_cache(maxsize=4)
 def get_dependencies(model_size: str = "large"):
-    """Get shared dependencies."""
+    """Get shared dependencies (memoized; reset with get_dependencies.cache_clear())."""
+    from imggen.config import get_settings
+    from imggen.domain.crypto import CryptoService
+    from imggen.infrastructure.database.sqlite import SQLiteImageRepository
+    from imggen.infrastructure.gpu.caching import HealthCachingProvider
+    from imggen.infrastructure.gpu.comfyui import ComfyUIProvider
+    from imggen.infrastructure.storage.local import LocalVaultStorage
+    from imggen.infrastructure.session import SessionManager
+    
+    settings = get_settings()
     settings.ensure_dirs()
     image_repo = SQLiteImageRepository(settings.db_path)
-    gpu_provider = ComfyUIProvider(
-        base_url=settings.comfyui_url,
-        timeout=settings.comfyui_timeout,
-        workflow_path=None,
-        model_size=model_size,
+    gpu_provider = HealthCachingProvider(
+        ComfyUIProvider(
+            base_url=settings.comfyui_url,
+            timeout=settings.comfyui_timeout,
+            workflow_path=None,
+            model_size=model_size,
+        ),
+        cache_ttl=settings.health_cache_ttl,
     )
     vault_storage = LocalVaultStorage(settings.vault_dir)
     crypto_service = CryptoService(
         time_cost=settings.argon2_time_cost,
         memory_cost=settings.argon2_memory_cost,
         parallelism=settings.argon2_parallelism,
+        kdf_algorithm=settings.kdf_algorithm,
+        kdf_hash=settings.kdf_hash,
+        pbkdf2_iterations=settings.pbkdf2_iterations,
     )
     session_manager = SessionManager(
         settings.session_dir,
@@ -56,6 +65,9 @@ def img2img_transform(
     model: str = typer.Option("medium", "-m", "--model", help="Model size (small/medium/large)"),
 ):
     """Transform an image using img2img (e.g., restyle to Ghibli)."""
+    import asyncio
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from imggen.application.img2img import Img2ImgUseCase
     
     input_image_path = Path(input_path)
     
@@ -81,7 +93,7 @@ def img2img_transform(
             progress.add_task(description="Transforming image...", total=None)
             
             image = asyncio.run(
-                use_case.execute(
+                run_and_close(gpu_provider, use_case.execute(
                     input_image_path=input_image_path,
                     prompt=prompt,
                     strength=strength,
@@ -89,7 +101,7 @@ def img2img_transform(
                     steps=steps,
                     cfg_scale=cfg_scale,
                     seed=seed,
-                )
+                ))
             )
         
         console.print(f"\n[bold green]✓[/bold green] Image transformed successfully!")
@@ -127,6 +139,9 @@ def restyle_image(
     negative_prompt: str = typer.Option("", "-n", "--negative", help="Negative prompt"),
 ):
     """Restyle an existing gallery image."""
+    import asyncio
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from imggen.application.img2img import RestyleImageUseCase
     
     try:
         image_repo, gpu_provider, vault_storage, crypto_service, session_manager = get_dependencies()
@@ -147,12 +162,12 @@ def restyle_image(
             progress.add_task(description="Restyling image...", total=None)
             
             new_image = asyncio.run(
-                use_case.execute(
+                run_and_close(gpu_provider, use_case.execute(
                     image_id=image_id,
                     style_prompt=style,
                     strength=strength,
                     negative_prompt=negative_prompt,
-                )
+                ))
             )
         
         console.print(f"\n[bold green]✓[/bold green] Image restyled successfully!")
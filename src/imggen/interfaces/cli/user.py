@@ -1,21 +1,15 @@
 """User management commands."""
 
+from functools import lru_cache
 import typer
 from rich.console import Console
-from rich.prompt import Prompt, Confirm
-from rich.panel import Panel
-from rich.table import Table
 
-from imggen.config import settings
-from imggen.domain.crypto import CryptoService
 from imggen.domain.exceptions import (
     UserAlreadyExistsError,
     AuthenticationError,
     UserNotFoundError,
     SessionExpiredError,
 )
-from imggen.infrastructure.database.sqlite import SQLiteUserRepository
-from imggen.infrastructure.session import SessionManager
 from imggen.application.auth import (
     RegisterUseCase,
     LoginUseCase,
@@ -27,18 +21,37 @@ user_app = typer.Typer()
 console = Console()
 
 
-def get_dependencies():
-    """Get shared dependencies."""
+@lru_cache(maxsize=1)
+def get_session_manager():
+    """Get the shared session manager (memoized; enough for logout and whoami)."""
+    from imggen.config import get_settings
+    from imggen.infrastructure.session import SessionManager
+    
+    settings = get_settings()
     settings.ensure_dirs()
+    return SessionManager(
+        settings.session_dir,
+        timeout=settings.session_timeout,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_dependencies():
+    """Get shared dependencies (memoized; reset with get_dependencies.cache_clear())."""
+    from imggen.config import get_settings
+    from imggen.domain.crypto import CryptoService
+    from imggen.infrastructure.database.sqlite import SQLiteUserRepository
+    
+    settings = get_settings()
+    session_manager = get_session_manager()
     user_repo = SQLiteUserRepository(settings.db_path)
     crypto_service = CryptoService(
         time_cost=settings.argon2_time_cost,
         memory_cost=settings.argon2_memory_cost,
         parallelism=settings.argon2_parallelism,
-    )
-    session_manager = SessionManager(
-        settings.session_dir,
-        timeout=settings.session_timeout,
+        kdf_algorithm=settings.kdf_algorithm,
+        kdf_hash=settings.kdf_hash,
+        pbkdf2_iterations=settings.pbkdf2_iterations,
     )
     return user_repo, crypto_service, session_manager
 
@@ -46,6 +59,8 @@ def get_dependencies():
 @user_app.command("register")
 def register():
     """Register a new user."""
+    from rich.prompt import Prompt
+    
     console.print("\n[bold cyan]Register New User[/bold cyan]\n")
     
     username = Prompt.ask("[bold]Username[/bold]")
@@ -82,6 +97,8 @@ def register():
 @user_app.command("login")
 def login():
     """Login and unlock vault."""
+    from rich.prompt import Prompt
+    
     console.print("\n[bold cyan]Login[/bold cyan]\n")
     
     username = Prompt.ask("[bold]Username[/bold]")
@@ -109,7 +126,7 @@ def login():
 def logout():
     """Logout and lock vault."""
     try:
-        _, _, session_manager = get_dependencies()
+        session_manager = get_session_manager()
         use_case = LogoutUseCase(session_manager)
         use_case.execute()
         
@@ -124,7 +141,7 @@ def logout():
 def whoami():
     """Show current user."""
     try:
-        _, _, session_manager = get_dependencies()
+        session_manager = get_session_manager()
         use_case = WhoAmIUseCase(session_manager)
         session = use_case.execute()
         
@@ -133,6 +150,8 @@ def whoami():
             console.print("[dim]Use 'imggen user login' to login[/dim]\n")
             raise typer.Exit(0)
         
+        from rich.table import Table
+        
         table = Table(title="Current Session", show_header=False, box=None)
         table.add_column("Field", style="cyan", no_wrap=True)
         table.add_column("Value", style="white")
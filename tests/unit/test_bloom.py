@@ -0,0 +1,33 @@
+"""Unit tests for prompt bloom filters."""
+
+from imggen.domain.bloom import BLOOM_BITS, build_prompt_bloom, bloom_may_contain
+
+
+def test_bloom_size():
+    """Test bloom filter has a fixed size."""
+    assert len(build_prompt_bloom("")) == BLOOM_BITS // 8
+    assert len(build_prompt_bloom("a beautiful sunset over the ocean")) == BLOOM_BITS // 8
+
+
+def test_bloom_matches_substrings():
+    """Test bloom filter never rejects a real substring."""
+    prompt = "A Beautiful Sunset over the ocean"
+    bloom = build_prompt_bloom(prompt)
+    
+    assert bloom_may_contain(bloom, "sunset")
+    assert bloom_may_contain(bloom, "BEAUTIFUL")
+    assert bloom_may_contain(bloom, "set over")
+
+
+def test_bloom_rejects_missing_keyword():
+    """Test bloom filter rejects keywords not in prompt."""
+    bloom = build_prompt_bloom("a beautiful sunset")
+    
+    assert not bloom_may_contain(bloom, "mountain")
+
+
+def test_bloom_short_keyword_always_matches():
+    """Test keywords too short to filter are passed through."""
+    bloom = build_prompt_bloom("a beautiful sunset")
+    
+    assert bloom_may_contain(bloom, "zz")
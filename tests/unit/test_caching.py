@@ -0,0 +1,88 @@
+"""Unit tests for the health-caching GPU provider."""
+
+import asyncio
+from types import SimpleNamespace
+
+from imggen.infrastructure.gpu import caching
+from imggen.infrastructure.gpu.base import GPUProvider
+from imggen.infrastructure.gpu.caching import HealthCachingProvider
+
+
+class RecordingProvider(GPUProvider):
+    """Provider that records calls and reports a settable health."""
+    
+    def __init__(self):
+        self.healthy = True
+        self.health_checks = 0
+        self.calls = []
+        self.closed = False
+    
+    async def generate(self, prompt, negative_prompt="", width=1024, height=1024,
+                       steps=25, cfg_scale=7.0, seed=None):
+        self.calls.append(("generate", prompt, width, height, seed))
+        return b"png"
+    
+    async def img2img(self, input_image, prompt, strength=0.75, negative_prompt="",
+                      steps=25, cfg_scale=7.0, seed=None):
+        self.calls.append(("img2img", input_image, prompt, strength))
+        return b"restyled"
+    
+    async def health_check(self):
+        self.health_checks += 1
+        return self.healthy
+    
+    async def aclose(self):
+        self.closed = True
+
+
+def _provider(monkeypatch, ttl=2.0):
+    clock = SimpleNamespace(now=100.0)
+    monkeypatch.setattr(caching, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    inner = RecordingProvider()
+    return HealthCachingProvider(inner, cache_ttl=ttl), inner, clock
+
+
+def test_healthy_result_is_cached_for_ttl(monkeypatch):
+    """Test that a healthy check is reused until the TTL runs out."""
+    provider, inner, clock = _provider(monkeypatch)
+    
+    assert asyncio.run(provider.health_check())
+    clock.now += 1.9
+    assert asyncio.run(provider.health_check())
+    assert inner.health_checks == 1
+    
+    clock.now += 0.2
+    assert asyncio.run(provider.health_check())
+    assert inner.health_checks == 2
+
+
+def test_unhealthy_result_is_not_cached(monkeypatch):
+    """Test that an unhealthy provider is checked again on every call."""
+    provider, inner, _ = _provider(monkeypatch)
+    inner.healthy = False
+    
+    assert not asyncio.run(provider.health_check())
+    assert not asyncio.run(provider.health_check())
+    inner.healthy = True
+    assert asyncio.run(provider.health_check())
+    
+    assert inner.health_checks == 3
+
+
+def test_calls_are_forwarded(monkeypatch):
+    """Test that generation, img2img, name and aclose reach the wrapped provider."""
+    provider, inner, _ = _provider(monkeypatch)
+    
+    assert asyncio.run(provider.generate("a fox", width=512, height=256, seed=3)) == b"png"
+    assert asyncio.run(provider.img2img(b"in", "anime", strength=0.5)) == b"restyled"
+    assert asyncio.run(provider.generate_batch("a fox", 2, seed=10)) == [b"png", b"png"]
+    asyncio.run(provider.aclose())
+    
+    assert provider.name == "RecordingProvider"
+    assert provider.max_batch_size(1024, 1024) == inner.max_batch_size(1024, 1024)
+    assert inner.calls[:2] == [
+        ("generate", "a fox", 512, 256, 3),
+        ("img2img", b"in", "anime", 0.5),
+    ]
+    assert sorted(call[4] for call in inner.calls[2:]) == [10, 11]
+    assert inner.closed
@@ -0,0 +1,25 @@
+"""Unit tests for the CLI application."""
+
+import pytest
+from typer.testing import CliRunner
+from imggen.interfaces.cli.app import SUBCOMMANDS, app
+
+runner = CliRunner()
+
+
+def test_help_lists_every_subcommand():
+    """Test that top-level help shows all subcommand groups."""
+    result = runner.invoke(app, ["--help"])
+    
+    assert result.exit_code == 0
+    for name in SUBCOMMANDS:
+        assert name in result.output
+
+
+@pytest.mark.parametrize("name", list(SUBCOMMANDS))
+def test_subcommand_help(name):
+    """Test that each lazily loaded subcommand group is reachable."""
+    result = runner.invoke(app, [name, "--help"])
+    
+    assert result.exit_code == 0, result.output
+    assert f"imggen {name}" in result.output
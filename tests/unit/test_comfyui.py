@@ -0,0 +1,58 @@
+"""Unit tests for the ComfyUI provider."""
+
+import asyncio
+
+import pytest
+from imggen.domain.exceptions import GenerationError
+from imggen.infrastructure.gpu.comfyui import ComfyUIProvider
+
+
+def _stub_provider(returned=None):
+    """Provider whose workflows are recorded instead of sent to ComfyUI."""
+    provider = ComfyUIProvider()
+    workflows = []
+    
+    async def execute_workflow(workflow):
+        workflows.append(workflow)
+        batch_size = workflow["4"]["inputs"]["batch_size"]
+        count = batch_size if returned is None else returned
+        seed = workflow["5"]["inputs"]["seed"]
+        return [{"filename": f"{seed}_{i}.png"} for i in range(count)]
+    
+    async def download_images(image_infos):
+        return [info["filename"].encode() for info in image_infos]
+    
+    provider._execute_workflow = execute_workflow
+    provider._download_images = download_images
+    return provider, workflows
+
+
+def test_generate_batch_splits_large_images_into_batches_of_4():
+    """Test that images of 768px and above are sampled 4 latents at a time."""
+    provider, workflows = _stub_provider()
+    
+    images = asyncio.run(provider.generate_batch("a fox", 10, width=768, height=512, seed=100))
+    
+    assert len(images) == 10
+    assert [w["4"]["inputs"]["batch_size"] for w in workflows] == [4, 4, 2]
+    assert [w["5"]["inputs"]["seed"] for w in workflows] == [100, 104, 108]
+
+
+def test_generate_batch_splits_small_images_into_batches_of_8():
+    """Test that images below 768px are sampled 8 latents at a time."""
+    provider, workflows = _stub_provider()
+    
+    images = asyncio.run(provider.generate_batch("a fox", 10, width=512, height=512, seed=7))
+    
+    assert images[0] == b"7_0.png"
+    assert images[8] == b"15_0.png"
+    assert [w["4"]["inputs"]["batch_size"] for w in workflows] == [8, 2]
+    assert [w["5"]["inputs"]["seed"] for w in workflows] == [7, 15]
+
+
+def test_generate_batch_short_result_raises():
+    """Test that a batch returning fewer images than requested fails."""
+    provider, _ = _stub_provider(returned=3)
+    
+    with pytest.raises(GenerationError):
+        asyncio.run(provider.generate_batch("a fox", 4, width=1024, height=1024, seed=1))
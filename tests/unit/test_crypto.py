@@ -1,8 +1,11 @@
 """Unit tests for crypto service."""
 
+import os
+
 import pytest
-from imggen.domain.crypto import CryptoService
+from imggen.domain.crypto import ALGORITHM_AES_GCM_HKDF, CryptoService
 from imggen.domain.exceptions import EncryptionError
+from imggen.domain.value_objects import EncryptedBlob
 
 
 def test_generate_salt():
@@ -30,6 +33,23 @@ def test_derive_keys():
     assert auth_hash != master_key  # Should be different
 
 
+def test_argon2_hasher_is_shared():
+    """Test that services with the same parameters share one hasher."""
+    crypto1 = CryptoService(time_cost=2, memory_cost=1024, parallelism=1)
+    crypto2 = CryptoService(time_cost=2, memory_cost=1024, parallelism=1)
+    
+    assert crypto1.ph is crypto2.ph
+    assert crypto1.ph is not CryptoService().ph
+
+
+def test_argon2_memory_cost_limit():
+    """Test that an excessive Argon2 memory cost is rejected up front."""
+    with pytest.raises(ValueError):
+        CryptoService(memory_cost=1 << 21)
+    with pytest.raises(ValueError):
+        CryptoService(memory_cost=65536, max_memory_cost=32768)
+
+
 def test_verify_auth_hash():
     """Test password verification."""
     crypto = CryptoService()
@@ -44,6 +64,51 @@ def test_verify_auth_hash():
     
     # Wrong password should not verify
     assert not crypto.verify_auth_hash(auth_hash, "wrong_password", auth_salt)
+    
+    # Malformed stored hashes never verify
+    assert not crypto.verify_auth_hash(auth_hash[:16], password, auth_salt)
+
+
+def test_derive_file_key():
+    """Test legacy file key derivation is RFC 5869 HKDF-SHA256 and memoized."""
+    import hashlib
+    import hmac
+    
+    crypto = CryptoService()
+    master_key = crypto.generate_salt()
+    salt = crypto.generate_salt()
+    
+    prk = hmac.new(salt, master_key, hashlib.sha256).digest()
+    expected = hmac.new(prk, b"file\x01", hashlib.sha256).digest()
+    
+    key = crypto.derive_file_key(master_key, salt, algorithm=ALGORITHM_AES_GCM_HKDF)
+    assert key == expected
+    assert crypto.derive_file_key(master_key, salt, algorithm=ALGORITHM_AES_GCM_HKDF) is key
+    assert crypto.derive_file_key(master_key, salt) != key
+
+
+def test_decrypt_legacy_hkdf_blob():
+    """Test blobs written with HKDF-SHA256 file keys still decrypt."""
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    
+    crypto = CryptoService()
+    master_key = crypto.generate_salt()
+    salt = crypto.generate_salt()
+    plaintext = b"written before BLAKE2b file keys"
+    
+    file_key = crypto.derive_file_key(master_key, salt, algorithm=ALGORITHM_AES_GCM_HKDF)
+    nonce = os.urandom(12)
+    blob = EncryptedBlob(
+        data=nonce + AESGCM(file_key).encrypt(nonce, plaintext, None),
+        salt=salt,
+        algorithm=ALGORITHM_AES_GCM_HKDF,
+    )
+    
+    assert crypto.decrypt(blob, master_key) == plaintext
+    
+    buf = bytearray()
+    crypto.decrypt_into(blob, master_key, buf)
+    assert buf == plaintext
 
 
 def test_encrypt_decrypt():
@@ -57,7 +122,7 @@ def test_encrypt_decrypt():
     
     assert blob.data != plaintext
     assert len(blob.salt) == 32
-    assert blob.algorithm == "AES-256-GCM"
+    assert blob.algorithm == "AES-256-GCM/BLAKE2b"
     
     # Decrypt
     decrypted = crypto.decrypt(blob, master_key)
@@ -65,6 +130,18 @@ def test_encrypt_decrypt():
     assert decrypted == plaintext
 
 
+def test_encrypt_decrypt_large():
+    """Test encryption of multi-megabyte payloads."""
+    crypto = CryptoService()
+    master_key = crypto.generate_salt()
+    plaintext = bytes(range(256)) * (4 * 1024 * 1024 // 256 + 1)
+    
+    blob = crypto.encrypt(plaintext, master_key)
+    
+    assert len(blob.data) == 12 + len(plaintext) + 16
+    assert crypto.decrypt(blob, master_key) == plaintext
+
+
 def test_encrypt_decrypt_metadata():
     """Test metadata encryption."""
     crypto = CryptoService()
@@ -98,6 +175,28 @@ def test_decrypt_with_wrong_key():
         crypto.decrypt(blob, wrong_key)
 
 
+def test_decrypt_with_tampered_salt_or_algorithm():
+    """Test salt and algorithm are authenticated through the derived file key."""
+    crypto = CryptoService()
+    master_key = crypto.generate_salt()
+    blob = crypto.encrypt(b"secret data", master_key)
+    
+    tampered_salt = EncryptedBlob(
+        data=blob.data,
+        salt=bytes([blob.salt[0] ^ 1]) + blob.salt[1:],
+        algorithm=blob.algorithm,
+    )
+    tampered_algorithm = EncryptedBlob(
+        data=blob.data,
+        salt=blob.salt,
+        algorithm=ALGORITHM_AES_GCM_HKDF,
+    )
+    
+    for tampered in (tampered_salt, tampered_algorithm):
+        with pytest.raises(EncryptionError):
+            crypto.decrypt(tampered, master_key)
+
+
 def test_deterministic_key_derivation():
     """Test that key derivation is deterministic."""
     crypto = CryptoService()
@@ -111,3 +210,122 @@ def test_deterministic_key_derivation():
     assert auth_hash1 == auth_hash2
     assert master_key1 == master_key2
 
+
+
+def test_pbkdf2_key_derivation():
+    """Test PBKDF2 key derivation and verification."""
+    crypto = CryptoService(kdf_algorithm="pbkdf2", kdf_hash="sha512", pbkdf2_iterations=1000)
+    password = "test_password_123"
+    auth_salt = crypto.generate_salt()
+    key_salt = crypto.generate_salt()
+    
+    auth_hash, master_key = crypto.derive_keys(password, auth_salt, key_salt)
+    
+    assert len(auth_hash) == 32
+    assert len(master_key) == 32
+    assert auth_hash != master_key
+    assert crypto.verify_auth_hash(auth_hash, password, auth_salt)
+    assert not crypto.verify_auth_hash(auth_hash, "wrong_password", auth_salt)
+
+
+def test_unlock():
+    """Test verifying a password and deriving the master key together."""
+    crypto = CryptoService(kdf_algorithm="pbkdf2", pbkdf2_iterations=1000)
+    password = "test_password_123"
+    auth_salt = crypto.generate_salt()
+    key_salt = crypto.generate_salt()
+    
+    auth_hash, master_key = crypto.derive_keys(password, auth_salt, key_salt)
+    
+    assert crypto.unlock(auth_hash, password, auth_salt, key_salt) == master_key
+    assert crypto.unlock(auth_hash, "wrong_password", auth_salt, key_salt) is None
+    assert crypto.verify_auth_hash(auth_hash, password.encode("utf-8"), auth_salt)
+
+
+def test_decrypt_into():
+    """Test decryption into a file and into a bytearray."""
+    import io
+    
+    crypto = CryptoService()
+    master_key = crypto.generate_salt()
+    plaintext = bytes(range(256)) * 1000  # Spans several chunks
+    
+    blob = crypto.encrypt(plaintext, master_key)
+    out = io.BytesIO()
+    written = crypto.decrypt_into(blob, master_key, out, bytearray(1024))
+    
+    assert written == len(plaintext)
+    assert out.getvalue() == plaintext
+    
+    buf = bytearray(b"stale")
+    assert crypto.decrypt_into(blob, master_key, buf) == len(plaintext)
+    assert buf == plaintext
+    
+    with pytest.raises(EncryptionError):
+        crypto.decrypt_into(blob, crypto.generate_salt(), io.BytesIO())
+
+
+def test_secure_buffer():
+    """Test secure buffers are writable, wiped, and usable for chunked decryption."""
+    import io
+    from imggen.domain.crypto import SecureBuffer
+    
+    crypto = CryptoService()
+    master_key = crypto.generate_salt()
+    plaintext = bytes(range(256)) * 20
+    blob = crypto.encrypt(plaintext, master_key)
+    
+    with SecureBuffer(1024) as buf:
+        out = io.BytesIO()
+        assert crypto.decrypt_into(blob, master_key, out, buf.view) == len(plaintext)
+        assert out.getvalue() == plaintext
+        
+        buf.wipe()
+        assert bytes(buf.view) == bytes(1024)
+
+
+def test_encrypt_many():
+    """Test batch encryption shares a salt but not nonces."""
+    crypto = CryptoService()
+    master_key = crypto.generate_salt()
+    plaintexts = [b"first", b"second", b""]
+    
+    blobs = crypto.encrypt_many(plaintexts, master_key)
+    
+    assert len({blob.salt for blob in blobs}) == 1
+    assert len({blob.data[:12] for blob in blobs}) == 3
+    assert [crypto.decrypt(blob, master_key) for blob in blobs] == plaintexts
+
+
+def test_encrypt_metadata_many():
+    """Test metadata and attachments are encrypted under one salt."""
+    crypto = CryptoService()
+    master_key = crypto.generate_salt()
+    metadata = {"prompt": "a fox", "seed": 7}
+    
+    metadata_blob, bloom_blob = crypto.encrypt_metadata_many(metadata, [b"bloom"], master_key)
+    
+    assert metadata_blob.salt == bloom_blob.salt
+    assert crypto.decrypt_metadata(metadata_blob, master_key) == metadata
+    assert crypto.decrypt(bloom_blob, master_key) == b"bloom"
+
+
+def test_encrypt_into():
+    """Test encryption into a file and a bytearray matches the blob layout."""
+    import io
+    from imggen.domain.crypto import ALGORITHM_AES_GCM_BLAKE2B
+    
+    crypto = CryptoService()
+    master_key = crypto.generate_salt()
+    plaintext = bytes(range(256)) * 20
+    
+    out = io.BytesIO()
+    salt = crypto.encrypt_into(plaintext, master_key, out, bytearray(1024))
+    blob = EncryptedBlob(data=out.getvalue(), salt=salt, algorithm=ALGORITHM_AES_GCM_BLAKE2B)
+    assert crypto.decrypt(blob, master_key) == plaintext
+    
+    buf = bytearray(b"stale")
+    salt = crypto.encrypt_into(plaintext, master_key, buf)
+    blob = EncryptedBlob(data=bytes(buf), salt=salt, algorithm=ALGORITHM_AES_GCM_BLAKE2B)
+    assert len(buf) == 12 + len(plaintext) + 16
+    assert crypto.decrypt(blob, master_key) == plaintext
@@ -58,6 +58,26 @@ def test_image_metadata():
     assert isinstance(metadata.created_at, datetime)
 
 
+def test_image_metadata_storage_dict():
+    """Test image metadata storage dict is model_dump with ISO timestamp and lowered prompt."""
+    metadata = ImageMetadata(
+        prompt="A Beautiful Sunset",
+        width=1024,
+        height=1024,
+        steps=25,
+        cfg_scale=7.0,
+        seed=42,
+        provider="ComfyUIProvider",
+    )
+    
+    expected = metadata.model_dump()
+    expected["created_at"] = metadata.created_at.isoformat()
+    expected["prompt_lower"] = "a beautiful sunset"
+    
+    assert metadata.to_storage_dict() == expected
+    assert ImageMetadata.from_storage_dict(metadata.to_storage_dict()) == metadata
+
+
 def test_encrypted_blob():
     """Test encrypted blob value object."""
     blob = EncryptedBlob(
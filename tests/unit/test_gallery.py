@@ -0,0 +1,244 @@
+"""Unit tests for gallery use cases."""
+
+from datetime import timedelta
+
+import pytest
+from typer.testing import CliRunner
+from imggen.application.auth import LogoutUseCase
+from imggen.application.encryption import store_encrypted
+from imggen.domain.bloom import build_prompt_bloom
+from imggen.application.gallery import (
+    ExportImageUseCase,
+    ListImagesUseCase,
+    SearchImagesUseCase,
+    _MetadataCache,
+    _metadata_cache,
+)
+from imggen.domain.clock import utcnow_dt
+from imggen.domain.crypto import CryptoService
+from imggen.domain.entities import Image
+from imggen.domain.exceptions import (
+    EncryptionError,
+    ImageNotFoundError,
+    SessionExpiredError,
+    VaultAccessError,
+)
+from imggen.domain.value_objects import EncryptedBlob, ImageMetadata, SessionInfo
+from imggen.infrastructure.database.sqlite import SQLiteImageRepository
+from imggen.infrastructure.session import SessionManager
+from imggen.infrastructure.storage.local import LocalVaultStorage
+from imggen.interfaces.cli import gallery as cli_gallery
+from imggen.interfaces.cli.app import app
+
+
+def _metadata():
+    return ImageMetadata(
+        prompt="a red fox",
+        width=512,
+        height=512,
+        steps=25,
+        cfg_scale=7.0,
+        seed=1,
+        provider="Fake",
+    )
+
+
+def test_logout_clears_metadata_cache(tmp_path):
+    """Test that decrypted metadata doesn't outlive the session."""
+    fingerprint = _MetadataCache.key_fingerprint(b"k" * 32)
+    _metadata_cache.put(1, fingerprint, _metadata())
+    assert _metadata_cache.get(1, fingerprint) is not None
+    
+    LogoutUseCase(SessionManager(tmp_path / "session")).execute()
+    
+    assert _metadata_cache.get(1, fingerprint) is None
+
+
+def test_list_after_unknown_image_raises(tmp_path):
+    """Test that a missing or foreign --after-id anchor is reported, not an empty page."""
+    image_repo = SQLiteImageRepository(tmp_path / "db.sqlite")
+    session_manager = SessionManager(tmp_path / "session")
+    session_manager.create_session(SessionInfo(
+        user_id=1,
+        username="alice",
+        master_key=b"k" * 32,
+        expires_at=utcnow_dt() + timedelta(hours=1),
+    ))
+    theirs = image_repo.create(Image(
+        user_id=2,
+        vault_path="2/a.png",
+        metadata_blob=EncryptedBlob(data=b"meta", salt=b"salt"),
+    ))
+    use_case = ListImagesUseCase(image_repo, session_manager)
+    
+    for after_id in (theirs.id, 999):
+        with pytest.raises(ImageNotFoundError):
+            use_case.iter(after_id=after_id)
+
+
+def test_session_expiry_clears_metadata_cache(tmp_path):
+    """Test that a session expiring in a long-lived process drops cached plaintext."""
+    session_manager = SessionManager(tmp_path / "session")
+    session_manager.create_session(SessionInfo(
+        user_id=1,
+        username="alice",
+        master_key=b"k" * 32,
+        expires_at=utcnow_dt() - timedelta(seconds=1),
+    ))
+    fingerprint = _MetadataCache.key_fingerprint(b"k" * 32)
+    _metadata_cache.put(1, fingerprint, _metadata())
+    
+    with pytest.raises(SessionExpiredError):
+        session_manager.get_session()
+    
+    assert _metadata_cache.get(1, fingerprint) is None
+
+
+def _gallery_with_images(tmp_path, count):
+    """Logged-in gallery with count encrypted images; returns its dependencies and images."""
+    crypto = CryptoService()
+    master_key = crypto.generate_salt()
+    image_repo = SQLiteImageRepository(tmp_path / "db.sqlite")
+    vault = LocalVaultStorage(tmp_path / "vault")
+    session_manager = SessionManager(tmp_path / "session")
+    session = SessionInfo(
+        user_id=1,
+        username="alice",
+        master_key=master_key,
+        expires_at=utcnow_dt() + timedelta(hours=1),
+    )
+    session_manager.create_session(session)
+    
+    images = []
+    for i in range(count):
+        vault_path = store_encrypted(crypto, vault, session, f"png {i}".encode(), f"image_{i}.png")
+        images.append(image_repo.create(Image(
+            user_id=1,
+            vault_path=vault_path,
+            metadata_blob=crypto.encrypt_metadata(_metadata().to_storage_dict(), master_key),
+        )))
+    return (image_repo, vault, crypto, session_manager), images
+
+
+def _corrupt(vault, image):
+    path = vault.vault_dir / image.vault_path
+    data = bytearray(path.read_bytes())
+    data[-1] ^= 1
+    path.write_bytes(bytes(data))
+
+
+def test_export_many_reports_each_image(tmp_path):
+    """Test that one bad image doesn't hide the exports that succeeded."""
+    deps, (good, corrupt, unreadable) = _gallery_with_images(tmp_path, 3)
+    image_repo, vault, crypto, session_manager = deps
+    _corrupt(vault, corrupt)
+    (vault.vault_dir / unreadable.vault_path).unlink()
+    out_dir = tmp_path / "out"
+    
+    exported, failed = ExportImageUseCase(image_repo, vault, crypto, session_manager).execute_many(
+        [good.id, corrupt.id, unreadable.id, 999], out_dir
+    )
+    
+    assert exported == {good.id: out_dir / f"image_{good.id}.png"}
+    assert exported[good.id].read_bytes() == b"png 0"
+    assert isinstance(failed[corrupt.id], EncryptionError)
+    assert isinstance(failed[unreadable.id], VaultAccessError)
+    assert 999 not in failed
+    # No unauthenticated plaintext is left behind
+    assert sorted(p.name for p in out_dir.iterdir()) == [f"image_{good.id}.png"]
+
+
+def test_export_many_cli_partial_failure(tmp_path, monkeypatch):
+    """Test that export-many prints a line per ID and exits non-zero on any failure."""
+    deps, (good, corrupt) = _gallery_with_images(tmp_path, 2)
+    _corrupt(deps[1], corrupt)
+    monkeypatch.setattr(cli_gallery, "get_dependencies", lambda: deps)
+    out_dir = tmp_path / "out"
+    
+    result = CliRunner().invoke(
+        app, ["gallery", "export-many", str(good.id), str(corrupt.id), "999", "-d", str(out_dir)]
+    )
+    
+    assert result.exit_code == 1
+    assert f"✓ {good.id}" in result.output
+    assert f"✗ {corrupt.id}: Decryption failed" in result.output
+    assert "Image 999 not found" in result.output
+    assert sorted(p.name for p in out_dir.iterdir()) == [f"image_{good.id}.png"]
+
+
+def _add_prompt(deps, prompt, bloom=True, master_key=None):
+    """Add an image row for prompt; bloom=False stores a legacy row without a bloom filter."""
+    image_repo, _, crypto, session_manager = deps
+    master_key = master_key or session_manager.require_session().master_key
+    metadata = _metadata().model_copy(update={"prompt": prompt})
+    metadata_blob, bloom_blob = crypto.encrypt_metadata_many(
+        metadata.to_storage_dict(), [build_prompt_bloom(prompt)], master_key
+    )
+    return image_repo.create(Image(
+        user_id=1,
+        vault_path=f"1/{prompt}.png",
+        metadata_blob=metadata_blob,
+        prompt_bloom=bloom_blob if bloom else None,
+    ))
+
+
+def _search(deps, keywords, **kwargs):
+    image_repo, _, crypto, session_manager = deps
+    _metadata_cache.clear()
+    results, unreadable = SearchImagesUseCase(image_repo, crypto, session_manager).execute(
+        keywords, **kwargs
+    )
+    return sorted(image.id for image, _ in results), unreadable
+
+
+def test_search_bloom_prefilter_and_legacy_rows(tmp_path):
+    """Test that rows without a bloom and keywords too short for the bloom still match."""
+    deps, _ = _gallery_with_images(tmp_path, 0)
+    fox = _add_prompt(deps, "a red fox")
+    legacy = _add_prompt(deps, "a grey fox", bloom=False)
+    _add_prompt(deps, "a blue whale")
+    
+    assert _search(deps, ["fox"]) == ([fox.id, legacy.id], 0)
+    assert _search(deps, ["ox"]) == ([fox.id, legacy.id], 0)
+    assert _search(deps, ["FOX", "red"]) == ([fox.id], 0)
+    assert _search(deps, ["zebra"]) == ([], 0)
+
+
+def test_search_any_vs_all_keywords(tmp_path):
+    """Test that --any matches either keyword while the default requires both."""
+    deps, _ = _gallery_with_images(tmp_path, 0)
+    fox = _add_prompt(deps, "a red fox")
+    whale = _add_prompt(deps, "a blue whale")
+    both = _add_prompt(deps, "a fox riding a whale", bloom=False)
+    
+    assert _search(deps, ["fox", "whale"]) == ([both.id], 0)
+    assert _search(deps, ["fox", "whale"], match_all=False) == ([fox.id, whale.id, both.id], 0)
+
+
+def test_search_stops_at_limit(tmp_path):
+    """Test that no more than limit matches are returned."""
+    deps, _ = _gallery_with_images(tmp_path, 0)
+    for i in range(5):
+        _add_prompt(deps, f"fox {i}")
+    
+    ids, _ = _search(deps, ["fox"], limit=3)
+    
+    assert len(ids) == 3
+
+
+def test_search_counts_undecryptable_rows(tmp_path, monkeypatch):
+    """Test that rows under another key are skipped and counted, and the CLI reports them."""
+    deps, _ = _gallery_with_images(tmp_path, 0)
+    other_key = b"o" * 32
+    fox = _add_prompt(deps, "a red fox")
+    _add_prompt(deps, "a foreign fox", master_key=other_key)
+    _add_prompt(deps, "a legacy foreign fox", bloom=False, master_key=other_key)
+    
+    assert _search(deps, ["fox"]) == ([fox.id], 2)
+    
+    monkeypatch.setattr(cli_gallery, "get_dependencies", lambda: deps)
+    _metadata_cache.clear()
+    result = CliRunner().invoke(app, ["gallery", "search", "fox"])
+    
+    assert result.exit_code == 0
+    assert "2 images could not be decrypted and were skipped" in result.output
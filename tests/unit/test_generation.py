@@ -0,0 +1,106 @@
+"""Unit tests for image generation use cases."""
+
+import asyncio
+
+import pytest
+from imggen.application.auth import LoginUseCase, RegisterUseCase
+from imggen.application.generation import GenerateImageUseCase
+from imggen.domain.crypto import CryptoService
+from imggen.domain.exceptions import GenerationError, VaultAccessError
+from imggen.infrastructure.database.sqlite import SQLiteImageRepository, SQLiteUserRepository
+from imggen.infrastructure.gpu.base import GPUProvider
+from imggen.infrastructure.session import SessionManager
+from imggen.infrastructure.storage.local import LocalVaultStorage
+
+
+class FakeProvider(GPUProvider):
+    """Provider that fails for the prompt "bad" and is slow for "slow"."""
+    
+    async def generate(self, prompt, negative_prompt="", width=1024, height=1024,
+                       steps=25, cfg_scale=7.0, seed=None):
+        if prompt == "bad":
+            raise GenerationError("generation failed")
+        if prompt == "slow":
+            await asyncio.sleep(0.05)
+        return b"image:" + prompt.encode()
+    
+    async def health_check(self):
+        return True
+
+
+def _use_case(tmp_path):
+    crypto = CryptoService(time_cost=1, memory_cost=1024, parallelism=1)
+    user_repo = SQLiteUserRepository(tmp_path / "db.sqlite")
+    image_repo = SQLiteImageRepository(tmp_path / "db.sqlite")
+    vault = LocalVaultStorage(tmp_path / "vault")
+    session_manager = SessionManager(tmp_path / "session")
+    RegisterUseCase(user_repo, crypto).execute("alice", "password123")
+    LoginUseCase(user_repo, crypto, session_manager).execute("alice", "password123")
+    use_case = GenerateImageUseCase(image_repo, FakeProvider(), vault, crypto, session_manager)
+    return use_case, image_repo, session_manager
+
+
+def _vault_files(tmp_path):
+    return [p for p in (tmp_path / "vault").rglob("*") if p.is_file()]
+
+
+def test_execute_batch_persists_all_images(tmp_path):
+    """Test that a successful batch stores one vault file per record."""
+    use_case, image_repo, session_manager = _use_case(tmp_path)
+    
+    images = asyncio.run(use_case.execute_batch(["a", "b", "c"], width=8, height=8))
+    
+    user_id = session_manager.require_session().user_id
+    assert all(image.id for image in images)
+    assert len(image_repo.list_by_user(user_id)) == 3
+    assert len(_vault_files(tmp_path)) == 3
+
+
+def test_execute_batch_failure_leaves_no_vault_files(tmp_path):
+    """Test that a failed batch removes the vault files it already wrote."""
+    use_case, image_repo, session_manager = _use_case(tmp_path)
+    asyncio.run(use_case.execute_batch(["a", "b", "c"], width=8, height=8))
+    
+    with pytest.raises(GenerationError):
+        asyncio.run(use_case.execute_batch(["a", "bad", "slow"], width=8, height=8))
+    
+    user_id = session_manager.require_session().user_id
+    assert len(image_repo.list_by_user(user_id)) == 3
+    assert len(_vault_files(tmp_path)) == 3
+
+
+def test_execute_batch_insert_failure_leaves_no_vault_files(tmp_path, monkeypatch):
+    """Test that vault files are removed when the database insert fails."""
+    use_case, image_repo, _ = _use_case(tmp_path)
+    
+    def fail(images):
+        raise RuntimeError("database is locked")
+    
+    monkeypatch.setattr(image_repo, "create_many", fail)
+    
+    with pytest.raises(RuntimeError):
+        asyncio.run(use_case.execute_batch(["a", "b"], width=8, height=8))
+    
+    assert _vault_files(tmp_path) == []
+
+
+def test_execute_batch_cleanup_survives_failed_delete(tmp_path, monkeypatch):
+    """Test that a failed vault delete doesn't hide the error or stop cleanup."""
+    use_case, image_repo, _ = _use_case(tmp_path)
+    vault = use_case.vault_storage
+    delete = vault.delete
+    attempted = []
+    
+    def flaky_delete(vault_path):
+        attempted.append(vault_path)
+        if len(attempted) == 1:
+            raise VaultAccessError("Failed to delete file: busy")
+        return delete(vault_path)
+    
+    monkeypatch.setattr(vault, "delete", flaky_delete)
+    
+    with pytest.raises(GenerationError):
+        asyncio.run(use_case.execute_batch(["a", "b", "bad"], width=8, height=8))
+    
+    assert len(attempted) == 2
+    assert len(_vault_files(tmp_path)) == 1
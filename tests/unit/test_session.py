@@ -0,0 +1,94 @@
+"""Unit tests for session management."""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from imggen.domain.clock import UTC, utcnow_dt
+from imggen.domain.exceptions import SessionExpiredError
+from imggen.domain.value_objects import SessionInfo
+from imggen.infrastructure.session import SESSION_MAGIC, SessionManager
+
+
+def _session(**overrides):
+    values = dict(
+        user_id=7,
+        username="alice",
+        master_key=bytes(range(32)),
+        created_at=utcnow_dt().replace(microsecond=123456),
+        expires_at=utcnow_dt() + timedelta(hours=1),
+    )
+    values.update(overrides)
+    return SessionInfo(**values)
+
+
+def test_session_roundtrip(tmp_path):
+    """Test that sessions use the binary format and read back unchanged."""
+    manager = SessionManager(tmp_path)
+    session = _session(username="älice")
+    
+    manager.create_session(session)
+    
+    assert manager.session_file.read_bytes()[:4] == SESSION_MAGIC
+    assert SessionManager(tmp_path).get_session() == session
+
+
+def test_legacy_json_session(tmp_path):
+    """Test that legacy JSON session files with naive timestamps are accepted."""
+    manager = SessionManager(tmp_path)
+    expires_at = datetime.now(UTC).replace(tzinfo=None) + timedelta(hours=1)
+    manager.session_file.write_text(json.dumps({
+        "user_id": 7,
+        "username": "alice",
+        "master_key": bytes(range(32)).hex(),
+        "created_at": datetime.now(UTC).replace(tzinfo=None).isoformat(),
+        "expires_at": expires_at.isoformat(),
+    }))
+    
+    session = manager.get_session()
+    
+    assert session.user_id == 7
+    assert session.username == "alice"
+    assert session.master_key == bytes(range(32))
+    assert session.expires_at == expires_at.replace(tzinfo=UTC)
+
+
+def test_session_cache_follows_file_changes(tmp_path):
+    """Test that the parsed session is reused until the file changes."""
+    manager = SessionManager(tmp_path)
+    manager.create_session(_session())
+    
+    first = manager.get_session()
+    assert manager.get_session() is first
+    
+    # A login from another process rewrites the file
+    SessionManager(tmp_path).create_session(_session(username="bob-the-second"))
+    assert manager.get_session().username == "bob-the-second"
+
+
+def test_clear_session_wipes_file(tmp_path):
+    """Test that clearing zeroes the session file in place, then removes it."""
+    manager = SessionManager(tmp_path)
+    manager.create_session(_session())
+    manager.get_session()
+    # A second link to the same inode shows what was left on disk
+    link = tmp_path / "link"
+    link.hardlink_to(manager.session_file)
+    size = link.stat().st_size
+    
+    manager.clear_session()
+    
+    assert not manager.session_file.exists()
+    assert link.read_bytes() == bytes(size)
+    assert manager.get_session() is None
+
+
+def test_expired_session(tmp_path):
+    """Test that an expired session is rejected and removed."""
+    manager = SessionManager(tmp_path)
+    manager.create_session(_session(expires_at=utcnow_dt() - timedelta(seconds=1)))
+    
+    with pytest.raises(SessionExpiredError):
+        manager.get_session()
+    
+    assert not manager.session_file.exists()
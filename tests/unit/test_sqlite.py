@@ -0,0 +1,149 @@
+"""Unit tests for the SQLite repositories."""
+
+import sqlite3
+from datetime import datetime
+
+from imggen.domain.clock import UTC, to_unix_micros
+from imggen.domain.entities import Image
+from imggen.domain.value_objects import EncryptedBlob
+from imggen.infrastructure.database import sqlite as sqlite_db
+from imggen.infrastructure.database.sqlite import (
+    SCHEMA_VERSION,
+    SQLiteImageRepository,
+    SQLiteUserRepository,
+    init_db,
+)
+
+# Schema and rows as written before created_at became Unix microseconds
+BASELINE_SCHEMA = """
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        auth_salt BLOB NOT NULL,
+        key_salt BLOB NOT NULL,
+        auth_hash BLOB NOT NULL,
+        created_at TEXT NOT NULL
+    );
+    CREATE TABLE images (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        vault_path TEXT NOT NULL,
+        metadata_data BLOB NOT NULL,
+        metadata_salt BLOB NOT NULL,
+        metadata_algorithm TEXT NOT NULL,
+        thumbnail_data BLOB,
+        thumbnail_salt BLOB,
+        thumbnail_algorithm TEXT,
+        created_at TEXT NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+    );
+    CREATE INDEX idx_images_user_id ON images(user_id);
+    CREATE INDEX idx_images_created_at ON images(created_at);
+"""
+
+
+def _baseline_db(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.execute(
+        "INSERT INTO users (username, auth_salt, key_salt, auth_hash, created_at) "
+        "VALUES ('alice', x'01', x'02', x'03', '2024-05-01T12:30:45.123456')"
+    )
+    conn.executemany(
+        "INSERT INTO images (user_id, vault_path, metadata_data, metadata_salt, "
+        "metadata_algorithm, created_at) VALUES (1, ?, x'aa', x'bb', 'AES-256-GCM', ?)",
+        [
+            ("1/a.png", "2024-05-02T08:00:00"),
+            ("1/b.png", "2024-05-03T09:15:30.000001+00:00"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_init_db_migrates_iso_created_at(tmp_path):
+    """Test that ISO TEXT timestamps are rebuilt as UTC Unix microseconds."""
+    db_path = tmp_path / "db.sqlite"
+    _baseline_db(db_path)
+    
+    init_db(db_path)
+    
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    assert conn.execute(
+        "SELECT typeof(created_at), created_at FROM images ORDER BY id"
+    ).fetchall() == [
+        ("integer", to_unix_micros(datetime(2024, 5, 2, 8, 0, 0, tzinfo=UTC))),
+        ("integer", to_unix_micros(datetime(2024, 5, 3, 9, 15, 30, 1, tzinfo=UTC))),
+    ]
+    conn.close()
+    
+    user = SQLiteUserRepository(db_path).get_by_username("alice")
+    assert user.created_at == datetime(2024, 5, 1, 12, 30, 45, 123456, tzinfo=UTC)
+    images = SQLiteImageRepository(db_path).list_by_user(1)
+    assert [image.vault_path for image in images] == ["1/b.png", "1/a.png"]
+    assert images[0].created_at == datetime(2024, 5, 3, 9, 15, 30, 1, tzinfo=UTC)
+    assert images[0].created_at.tzinfo is not None
+
+
+def test_init_db_skips_up_to_date_database(tmp_path, monkeypatch):
+    """Test that a second init_db only reads the schema version."""
+    db_path = tmp_path / "db.sqlite"
+    _baseline_db(db_path)
+    init_db(db_path)
+    
+    statements = []
+    connect = sqlite3.connect
+    
+    def traced_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+    
+    monkeypatch.setattr(sqlite_db.sqlite3, "connect", traced_connect)
+    init_db(db_path)
+    
+    assert statements == ["PRAGMA user_version"]
+
+
+def _add_images(repo, user_id, created_ats):
+    return repo.create_many([
+        Image(
+            user_id=user_id,
+            vault_path=f"{user_id}/{i}.png",
+            metadata_blob=EncryptedBlob(data=b"meta", salt=b"salt"),
+            created_at=created_at,
+        )
+        for i, created_at in enumerate(created_ats)
+    ])
+
+
+def test_iter_by_user_keyset_pages(tmp_path):
+    """Test that after_id pages walk every image once, including created_at ties."""
+    repo = SQLiteImageRepository(tmp_path / "db.sqlite")
+    same_time = datetime(2024, 1, 1, tzinfo=UTC)
+    _add_images(repo, 1, [datetime(2023, 1, 1, tzinfo=UTC)] + [same_time] * 4)
+    _add_images(repo, 2, [same_time])
+    
+    expected = [image.id for image in repo.iter_by_user(1)]
+    pages, after_id = [], None
+    while page := [image.id for image in repo.iter_by_user(1, limit=2, after_id=after_id)]:
+        pages.append(page)
+        after_id = page[-1]
+    
+    assert len(expected) == 5
+    assert [image_id for page in pages for image_id in page] == expected
+    assert [len(page) for page in pages] == [2, 2, 1]
+
+
+def test_get_many_chunks_ids(tmp_path, monkeypatch):
+    """Test that get_many splits large ID lists and skips other users' images."""
+    monkeypatch.setattr(sqlite_db, "MAX_IN_PARAMS", 2)
+    repo = SQLiteImageRepository(tmp_path / "db.sqlite")
+    mine = _add_images(repo, 1, [datetime(2024, 1, 1, tzinfo=UTC)] * 4)
+    theirs = _add_images(repo, 2, [datetime(2024, 1, 1, tzinfo=UTC)])
+    
+    ids = [image.id for image in mine] + [theirs[0].id, 999]
+    images = repo.get_many(ids, 1)
+    
+    assert sorted(image.id for image in images) == sorted(image.id for image in mine)
@@ -0,0 +1,125 @@
+"""Unit tests for local vault storage."""
+
+import io
+import json
+
+import pytest
+from imggen.domain.crypto import ALGORITHM_AES_GCM_BLAKE2B, CryptoService
+from imggen.domain.exceptions import VaultAccessError
+from imggen.infrastructure.storage.local import (
+    MMAP_MIN_SIZE,
+    VAULT_MAGIC,
+    VAULT_VERSION,
+    LocalVaultStorage,
+    _VAULT_HEADER,
+)
+
+
+def test_retrieve_returns_bytes_for_large_files(tmp_path):
+    """Test that retrieve never hands out a file mapping."""
+    crypto = CryptoService()
+    master_key = crypto.generate_salt()
+    storage = LocalVaultStorage(tmp_path)
+    plaintext = b"x" * (MMAP_MIN_SIZE + 1)
+    
+    vault_path = storage.store(1, crypto.encrypt(plaintext, master_key), "image.png")
+    blob = storage.retrieve(vault_path)
+    
+    assert type(blob.data) is bytes
+    assert crypto.decrypt(blob, master_key) == plaintext
+
+
+def test_open_blob_unmaps_large_files_on_exit(tmp_path):
+    """Test that a memory-mapped blob is only usable inside the with block."""
+    crypto = CryptoService()
+    master_key = crypto.generate_salt()
+    storage = LocalVaultStorage(tmp_path)
+    plaintext = b"x" * (MMAP_MIN_SIZE + 1)
+    vault_path = storage.store(1, crypto.encrypt(plaintext, master_key), "image.png")
+    
+    with storage.open_blob(vault_path) as blob:
+        assert isinstance(blob.data, memoryview)
+        out = io.BytesIO()
+        crypto.decrypt_into(blob, master_key, out)
+    
+    assert out.getvalue() == plaintext
+    with pytest.raises(ValueError):
+        len(blob.data)  # released
+
+
+def test_open_blob_missing_file(tmp_path):
+    """Test that a missing vault file yields None."""
+    storage = LocalVaultStorage(tmp_path)
+    
+    with storage.open_blob("1/missing.png") as blob:
+        assert blob is None
+
+
+def test_store_retrieve_roundtrip(tmp_path):
+    """Test that vault files use the binary header format and read back."""
+    crypto = CryptoService()
+    master_key = crypto.generate_salt()
+    storage = LocalVaultStorage(tmp_path)
+    blob = crypto.encrypt(b"image bytes", master_key)
+    
+    vault_path = storage.store(1, blob, "image.png")
+    
+    assert (tmp_path / vault_path).read_bytes()[:4] == VAULT_MAGIC
+    retrieved = storage.retrieve(vault_path)
+    assert retrieved == blob
+    assert crypto.decrypt(retrieved, master_key) == b"image bytes"
+
+
+def test_store_stream_roundtrip(tmp_path):
+    """Test that streamed vault files read back like stored blobs."""
+    crypto = CryptoService()
+    master_key = crypto.generate_salt()
+    storage = LocalVaultStorage(tmp_path)
+    salt = crypto.generate_salt()
+    
+    vault_path = storage.store_stream(
+        user_id=1,
+        filename="image.png",
+        algorithm=ALGORITHM_AES_GCM_BLAKE2B,
+        salt=salt,
+        write=lambda f: crypto.encrypt_into(b"image bytes", master_key, f, salt=salt),
+    )
+    blob = storage.retrieve(vault_path)
+    
+    assert blob.salt == salt
+    assert blob.algorithm == ALGORITHM_AES_GCM_BLAKE2B
+    assert crypto.decrypt(blob, master_key) == b"image bytes"
+
+
+def test_retrieve_legacy_json_file(tmp_path):
+    """Test that legacy hex-in-JSON vault files are still readable."""
+    crypto = CryptoService()
+    master_key = crypto.generate_salt()
+    storage = LocalVaultStorage(tmp_path)
+    blob = crypto.encrypt(b"legacy image", master_key)
+    (tmp_path / "1").mkdir()
+    (tmp_path / "1" / "legacy.png").write_text(json.dumps({
+        "data": blob.data.hex(),
+        "salt": blob.salt.hex(),
+        "algorithm": blob.algorithm,
+        "created_at": "2024-01-01T00:00:00",
+    }))
+    
+    retrieved = storage.retrieve("1/legacy.png")
+    
+    assert retrieved == blob
+    assert crypto.decrypt(retrieved, master_key) == b"legacy image"
+    with storage.open_blob("1/legacy.png") as opened:
+        assert opened == blob
+
+
+def test_retrieve_unsupported_version(tmp_path):
+    """Test that vault files from a newer format version are rejected."""
+    storage = LocalVaultStorage(tmp_path)
+    (tmp_path / "1").mkdir()
+    (tmp_path / "1" / "future.png").write_bytes(
+        _VAULT_HEADER.pack(VAULT_MAGIC, VAULT_VERSION + 1, 0, 0)
+    )
+    
+    with pytest.raises(VaultAccessError):
+        storage.retrieve("1/future.png")